@@ -16,14 +16,18 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import argparse
+import hashlib
+import os
 import pdb
 import re
+import sqlite3
 import sys
-import xml.etree.ElementTree as ET
 
-# Namespaces
-AIXM = '{http://www.aixm.aero/schema/5.1}'
-GML = '{http://www.opengis.net/gml/3.2}'
+from aixm import AIXM, GML, iter_members
+from kmlwriter import KMLWriter
+
+# Bumped whenever the index layout changes, so older indexes are rebuilt
+INDEX_VERSION = '3'
 
 def fatal(msg):
     print(msg, file=sys.stderr)
@@ -57,7 +61,164 @@ def load_foreflight(fname):
 
     return airports
 
+def identifier(m):
+    # ICAO code when there is one, FAA designator otherwise
+    icao = m.findall(f'.//{AIXM}locationIndicatorICAO')
+    if icao:
+        return icao[0].text
+
+    des = m.findall(f'.//{AIXM}designator')
+    if des:
+        return des[0].text
+
+    return None
+
+def iter_airports(fname):
+    # Stream (identifier, AirportHeliport element) pairs out of an AIXM file
+    for member in iter_members(fname):
+        if len(member) and member[0].tag == f'{AIXM}AirportHeliport':
+            loc = identifier(member[0])
+            if loc:
+                yield loc, member[0]
+
+def coordinates(m):
+    # gml:pos of the reference point, "lon lat"
+    return m.findall(f'.//{AIXM}ARP/{AIXM}ElevatedPoint/{GML}pos')[0].text
+
+def scan_database(fname, airports):
+    # Yield (identifier, KML coordinates) for the desired airports
+    for loc, m in iter_airports(fname):
+        if loc not in airports:
+            continue
+
+        try:
+            pos = coordinates(m)
+        except IndexError:
+            continue
+
+        yield loc, pos.replace(' ', ',')
+
+def default_index(database):
+    return database + '.sqlite'
+
+def sha256(fname):
+    h = hashlib.sha256()
+    with open(fname, 'rb') as fd:
+        for block in iter(lambda: fd.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def airport_record(loc, m):
+    # (ident, lat, lon, elevation, name, pos), or None without a reference
+    # point. pos is the gml:pos text as is, so the index gives the same KML
+    # coordinates as scan_database().
+    try:
+        pos = coordinates(m)
+        lon, lat = map(float, pos.split()[:2])
+    except (IndexError, ValueError):
+        return None
+
+    elev = m.findall(f'.//{AIXM}fieldElevation')
+    try:
+        elevation = float(elev[0].text)
+    except (IndexError, TypeError, ValueError):
+        elevation = None
+
+    name = m.findall(f'.//{AIXM}name')
+    name = name[0].text if name else None
+
+    return loc, lat, lon, elevation, name, pos
+
+def build_index(fname, database):
+    # An interrupted build leaves the previous index in place
+    log(f'Building airport index {fname}...')
+    tmp = fname + '.tmp'
+    if os.path.exists(tmp):
+        os.unlink(tmp)
+
+    st = os.stat(database)
+    conn = sqlite3.connect(tmp)
+    conn.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)')
+    # Identifiers are not unique in the FAA data; every record is kept, like
+    # scan_database() yields every match
+    conn.execute('CREATE TABLE airports (ident TEXT, '
+        'lat REAL, lon REAL, elevation REAL, name TEXT, pos TEXT)')
+
+    records = (airport_record(loc, m) for loc, m in iter_airports(database))
+    conn.executemany('INSERT INTO airports VALUES (?, ?, ?, ?, ?, ?)',
+        (r for r in records if r))
+    conn.execute('CREATE INDEX airports_ident ON airports (ident)')
+
+    conn.executemany('INSERT INTO meta VALUES (?, ?)', [
+        ('version', INDEX_VERSION),
+        ('source', os.path.abspath(database)),
+        ('mtime_ns', str(st.st_mtime_ns)),
+        ('size', str(st.st_size)),
+        ('sha256', sha256(database)),
+    ])
+    conn.commit()
+    count = conn.execute('SELECT COUNT(*) FROM airports').fetchone()[0]
+    conn.close()
+
+    os.replace(tmp, fname)
+    log(f'Indexed {count} airports')
+
+def index_is_current(fname, database):
+    if not os.path.exists(fname):
+        return False
+
+    conn = sqlite3.connect(fname)
+    try:
+        meta = dict(conn.execute('SELECT key, value FROM meta'))
+        if meta.get('version') != INDEX_VERSION:
+            return False
+        st = os.stat(database)
+        if meta.get('size') != str(st.st_size):
+            return False
+        if meta.get('mtime_ns') == str(st.st_mtime_ns):
+            return True
+
+        # Touched but maybe not changed (e.g. downloaded again)
+        if meta.get('sha256') != sha256(database):
+            return False
+        conn.execute("UPDATE meta SET value = ? WHERE key = 'mtime_ns'",
+            (str(st.st_mtime_ns),))
+        conn.commit()
+        return True
+
+    except sqlite3.DatabaseError:
+        return False
+
+    finally:
+        conn.close()
+
+def scan_index(fname, database, airports):
+    # Same as scan_database(), served from the index in database order
+    if not index_is_current(fname, database):
+        build_index(fname, database)
+
+    conn = sqlite3.connect(fname)
+    try:
+        rows = []
+        for loc in airports:
+            for rowid, pos in conn.execute(
+                    'SELECT rowid, pos FROM airports WHERE ident = ?', (loc,)):
+                rows.append((rowid, loc, pos.replace(' ', ',')))
+    finally:
+        conn.close()
+
+    for _, loc, coords in sorted(rows):
+        yield loc, coords
+
 def main(args):
+    index = args.index
+    if index is True or (index is None and args.build_index):
+        index = default_index(args.database)
+
+    if args.build_index:
+        build_index(index, args.database)
+        return
+
     # Desired airports
     log('Loading desired airports...')
 
@@ -69,55 +230,40 @@ def main(args):
         airports = set([a.strip() for a in airports])
 
     # FAA Database
-    log('Loading airport database (may take a while)...')
-    dbXml = ET.parse(args.database)
-    dbRoot = dbXml.getroot()
-
-    # Output
-    tree = ET.ElementTree()
-    kml = ET.Element('kml')
-    tree._setroot(kml)
-    doc = ET.SubElement(kml, 'Document')
-    ET.SubElement(doc, 'name').text = 'Airports'
-
-    log('Processing...')
-    for member in dbRoot:
-        m = member[0]
-        if m.tag != f'{AIXM}AirportHeliport':
-            continue
-
-        try:
-            icao = m.findall(f'.//{AIXM}locationIndicatorICAO')
-            if icao:
-                loc = icao[0].text
-            else:
-                loc = m.findall(f'.//{AIXM}designator')[0].text
-
-            if loc not in airports:
-                continue
+    if index:
+        log(f'Looking up airport index {index}...')
+        found = scan_index(index, args.database, airports)
+    else:
+        log('Scanning airport database...')
+        found = scan_database(args.database, airports)
 
-            pos = m.findall(f'.//{AIXM}ARP/{AIXM}ElevatedPoint/{GML}pos')[0].text
+    # Placemarks are written out as they are found
+    with KMLWriter(args.output, 'Airports') as kml:
+        for loc, coords in found:
             log(loc)
+            kml.placemark(loc, coords)
 
-        except IndexError:
-            continue
-
-        place = ET.SubElement(doc, 'Placemark')
-        ET.SubElement(place, 'name').text = loc
-        point = ET.SubElement(place, 'Point')
-        ET.SubElement(point, 'coordinates').text = pos.replace(' ', ',')
-
-    log('Writing KML...')
-    tree.write(args.output, xml_declaration=True)
+    log(f'Wrote {kml.count} airports to {args.output}')
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(
         description='Convert NAV data from the FAA format to KML',
         epilog='Get current databases at https://nfdc.faa.gov')
     parser.add_argument('database', help='FAA APT_AIXM.xml file')
-    parser.add_argument('airports', help='List of desired airports')
-    parser.add_argument('output', help='KML output file')
+    parser.add_argument('airports', nargs='?', help='List of desired airports')
+    parser.add_argument('output', nargs='?',
+        help='KML output file (.kml, .kml.gz or .kmz)')
     parser.add_argument('--foreflight', action='store_true',
         help='Parse desired airports from a Foreflight logbook')
+    parser.add_argument('--index', nargs='?', const=True, metavar='FILE',
+        help='Look airports up in an index of DATABASE, rebuilt whenever '
+            'DATABASE changes [DATABASE.sqlite]')
+    parser.add_argument('--build-index', action='store_true',
+        help='Only build the index of DATABASE (at the --index FILE if '
+            'given), then exit; AIRPORTS and OUTPUT are not needed')
+
+    args = parser.parse_args()
+    if not args.build_index and args.output is None:
+        parser.error('the following arguments are required: airports, output')
 
-    main(parser.parse_args())
+    main(args)
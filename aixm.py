@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+# Streaming reader for the FAA AIXM 5.1 files shared by the scripts
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# The FAA files are one root element holding hundreds of thousands of
+# members. iter_members() hands them out one at a time and drops each as
+# soon as the caller asks for the next, so memory stays flat no matter how
+# large the file is.
+#
+#   for member in iter_members('APT_AIXM.xml'):
+#       if member[0].tag == AIXM + 'AirportHeliport':
+#           ...
+
+import xml.etree.ElementTree as ET
+
+# Namespaces
+AIXM = '{http://www.aixm.aero/schema/5.1}'
+GML = '{http://www.opengis.net/gml/3.2}'
+
+def iter_members(fname):
+    # Only the depth is tracked: a member is complete when its end tag
+    # closes depth 1
+    depth = 0
+    root = None
+    for event, elem in ET.iterparse(fname, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            depth += 1
+            continue
+
+        depth -= 1
+        if depth != 1:
+            continue
+
+        yield elem
+        root.clear()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+
+# Compare peak memory and wall time of airports.py's streaming AIXM scan
+# against loading the whole tree with ET.parse()
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+
+from aixm import AIXM
+from airports import identifier, iter_airports
+
+WANTED = {f'KX{i:02d}' for i in range(50)}
+
+def generate(fname, count, seed=0):
+    # Write a synthetic APT_AIXM.xml with `count` airports, each followed by
+    # a runway member so that most of the file is not airports
+    rng = random.Random(seed)
+    with open(fname, 'w', encoding='utf-8') as fd:
+        fd.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        fd.write('<message:AIXMBasicMessage'
+            ' xmlns:message="http://www.aixm.aero/schema/5.1/message"'
+            ' xmlns:aixm="http://www.aixm.aero/schema/5.1"'
+            ' xmlns:gml="http://www.opengis.net/gml/3.2" gml:id="M">\n')
+
+        for i in range(count):
+            lat = rng.uniform(18, 71)
+            lon = rng.uniform(-170, -65)
+            elev = rng.randrange(-100, 10000)
+            icao = f'<aixm:locationIndicatorICAO>KX{i:02d}</aixm:locationIndicatorICAO>' \
+                if i % 3 == 0 else ''
+            fd.write(f'''<message:hasMember>
+<aixm:AirportHeliport gml:id="AH_{i}"><aixm:timeSlice>
+<aixm:AirportHeliportTimeSlice gml:id="AHT_{i}">
+<aixm:designator>X{i:05d}</aixm:designator>
+<aixm:name>AIRPORT {i}</aixm:name>{icao}
+<aixm:fieldElevation uom="FT">{elev}</aixm:fieldElevation>
+<aixm:ARP><aixm:ElevatedPoint gml:id="EP_{i}" srsName="urn:ogc:def:crs:EPSG::4326">
+<gml:pos>{lon:.6f} {lat:.6f}</gml:pos>
+<aixm:elevation uom="FT">{elev}</aixm:elevation>
+</aixm:ElevatedPoint></aixm:ARP>
+</aixm:AirportHeliportTimeSlice>
+</aixm:timeSlice></aixm:AirportHeliport>
+</message:hasMember>
+<message:hasMember>
+<aixm:Runway gml:id="RWY_{i}"><aixm:timeSlice>
+<aixm:RunwayTimeSlice gml:id="RWYT_{i}">
+<aixm:designator>18/36</aixm:designator>
+<aixm:nominalLength uom="FT">{rng.randrange(1500, 12000)}</aixm:nominalLength>
+<aixm:nominalWidth uom="FT">{rng.randrange(50, 200)}</aixm:nominalWidth>
+<aixm:surfaceProperties><aixm:SurfaceCharacteristics gml:id="SC_{i}">
+<aixm:composition>ASPH</aixm:composition>
+<aixm:preparation>GROOVED</aixm:preparation>
+<aixm:surfaceCondition>GOOD</aixm:surfaceCondition>
+</aixm:SurfaceCharacteristics></aixm:surfaceProperties>
+<aixm:associatedAirportHeliport xlink:href="#AH_{i}" xmlns:xlink="http://www.w3.org/1999/xlink"/>
+</aixm:RunwayTimeSlice>
+</aixm:timeSlice></aixm:Runway>
+</message:hasMember>
+''')
+
+        fd.write('</message:AIXMBasicMessage>\n')
+
+def scan_tree(fname):
+    # The original approach: load everything, then walk the members
+    found = 0
+    for member in ET.parse(fname).getroot():
+        m = member[0]
+        if m.tag == f'{AIXM}AirportHeliport' and identifier(m) in WANTED:
+            found += 1
+    return found
+
+def scan_stream(fname):
+    return sum(1 for loc, m in iter_airports(fname) if loc in WANTED)
+
+def child(mode, fname):
+    start = time.perf_counter()
+    found = scan_tree(fname) if mode == 'tree' else scan_stream(fname)
+    elapsed = time.perf_counter() - start
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        rss //= 1024  # bytes on macOS, KiB elsewhere
+    print(found, elapsed, rss)
+
+def run(mode, fname):
+    out = subprocess.run([sys.executable, __file__, '--child', mode, fname],
+        check=True, capture_output=True, text=True).stdout
+    found, elapsed, rss = out.split()
+    return int(found), float(elapsed), int(rss)
+
+def main(args):
+    if args.child:
+        child(args.child, args.database)
+        return
+
+    fname = args.database
+    tmp = None
+    if not fname:
+        fd, tmp = tempfile.mkstemp(suffix='.xml')
+        os.close(fd)
+        fname = tmp
+        generate(fname, args.count)
+
+    try:
+        size = os.path.getsize(fname)
+        print(f'{fname}: {size / 2**20:.1f} MiB')
+        for mode in ('tree', 'stream'):
+            found, elapsed, rss = run(mode, fname)
+            print(f'{mode:<7} {elapsed:7.2f} s  {rss / 1024:8.1f} MiB peak RSS  ({found} found)')
+    finally:
+        if tmp:
+            os.unlink(tmp)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Benchmark the airports.py AIXM scan')
+    parser.add_argument('database', nargs='?',
+        help='APT_AIXM.xml file (default: generate one)')
+    parser.add_argument('--count', type=int, default=100000,
+        help='Airports in the generated file [%(default)s]')
+    parser.add_argument('--child', choices=('tree', 'stream'),
+        help=argparse.SUPPRESS)
+
+    main(parser.parse_args())
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+# Compare FIX.txt decoding speed of faa_fixes_to_kml.py's per-line regex
+# path against the vectorized NumPy path
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import importlib.util
+import os
+import random
+import tempfile
+import time
+
+# The script name has no valid module name, so load it by path
+spec = importlib.util.spec_from_file_location('faa_fixes_to_kml',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'faa_fixes_to_kml.py'))
+fixes = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(fixes)
+
+def dms(value, pos, neg):
+    side = pos if value >= 0 else neg
+    value = abs(value)
+    deg = int(value)
+    min = int((value - deg) * 60)
+    sec = (value - deg - min / 60) * 3600
+    return f'{deg:02d}-{min:02d}-{sec:06.3f}{side}'
+
+def generate(fname, count, seed=0):
+    # FIX1 records at the FAA column positions, each followed by other
+    # record types that the decoder has to skip
+    rng = random.Random(seed)
+    with open(fname, 'w', encoding='ascii') as f:
+        for i in range(count):
+            lat = rng.uniform(18, 71)
+            lon = rng.uniform(-170, -65)
+            f.write('FIX1' + f'FX{i:05d}'.ljust(30) + 'STATE'.ljust(30) + 'K2'
+                + dms(lat, 'N', 'S').ljust(14) + dms(lon, 'E', 'W').ljust(14)
+                + ' ' * 40 + 'WAYPOINT\n')
+            f.write('FIX2' + f'FX{i:05d}'.ljust(30) + 'STATE'.ljust(30) + 'K2 VOR*123.45\n')
+            f.write('FIX3' + f'FX{i:05d}'.ljust(30) + 'STATE'.ljust(30) + 'K2 ILS*ABC\n')
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def main(args):
+    fd, fname = tempfile.mkstemp(suffix='.txt')
+    os.close(fd)
+    try:
+        generate(fname, args.count)
+        center = [(37.61946088067242, -122.3738855647427)]
+
+        scalar = timed(lambda: fixes.selectScalar(fname, center, 50, 1.0))
+        vector = timed(lambda: fixes.selectVectorized(fname, center, 50, 1.0))
+
+        print(f'{args.count} FIX1 records')
+        print(f'regex      {args.count / scalar:12,.0f} records/s')
+        print(f'vectorized {args.count / vector:12,.0f} records/s ({scalar / vector:.1f}x)')
+    finally:
+        os.unlink(fname)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Benchmark faa_fixes_to_kml.py FIX.txt decoding')
+    parser.add_argument('--count', type=int, default=70000,
+        help='FIX1 records in the generated file [%(default)s]')
+
+    main(parser.parse_args())
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""Benchmark sunrise_sunset.py for speed and accuracy, as JSON.
+
+Measures scalar sunrise_sunset() calls per second, sunrise_sunset_batch()
+throughput and CLI startup time, and the error of both APIs against the
+reference table in sunrise_sunset_reference.csv, so an optimization can be
+judged on both axes. Pass a previous run with --baseline to get the
+relative change of every number.
+
+The reference table is generated by this script (--write-reference) with a
+more precise solver than the one under test: the NOAA/Meeus solar position
+(apparent longitude, nutation-corrected obliquity, full equation of time)
+evaluated at the event instant itself, iterated to convergence, for the
+same -0.833° horizon, which is what the NOAA solar calculator does.
+
+Usage:
+    python bench_sunrise_sunset.py [-n N] [-o results.json] [--baseline old.json]
+    python bench_sunrise_sunset.py --write-reference
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from sunrise_sunset import sunrise_sunset
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REFERENCE = os.path.join(HERE, "sunrise_sunset_reference.csv")
+SCRIPT = os.path.join(HERE, "sunrise_sunset.py")
+
+# Reference sites: the test suite's cities plus a latitude sweep
+REFERENCE_SITES = [
+    (40.7128, -74.0060), (51.5074, -0.1278), (35.6762, 139.6503),
+    (-33.8688, 151.2093), (-0.1807, -78.4678), (64.1466, -21.9426),
+    (-33.9249, 18.4241), (28.6139, 77.2090), (34.0522, -118.2437),
+    (-54.8019, -68.3030), (69.6492, 18.9553), (1.3521, 103.8198),
+] + [(lat, lon) for lat, lon in zip(range(-60, 61, 15), range(-160, 180, 40))]
+REFERENCE_DATES = [date(2026, m, d) for m in range(1, 13) for d in (1, 15)]
+
+
+# ---------------------------------------------------------------------------
+# Reference solver
+# ---------------------------------------------------------------------------
+
+def _solar_position(jd):
+    """Apparent declination (radians) and equation of time (minutes) at jd."""
+    t = (jd - 2451545.0) / 36525
+    l0 = math.radians((280.46646 + t * (36000.76983 + t * 0.0003032)) % 360)
+    m = math.radians(357.52911 + t * (35999.05029 - 0.0001537 * t))
+    e = 0.016708634 - t * (0.000042037 + 0.0000001267 * t)
+    c = (math.sin(m) * (1.914602 - t * (0.004817 + 0.000014 * t))
+         + math.sin(2 * m) * (0.019993 - 0.000101 * t)
+         + math.sin(3 * m) * 0.000289)
+    omega = math.radians(125.04 - 1934.136 * t)
+    app_long = math.radians(math.degrees(l0) + c - 0.00569 - 0.00478 * math.sin(omega))
+    eps0 = 23 + (26 + (21.448 - t * (46.815 + t * (0.00059 - t * 0.001813))) / 60) / 60
+    eps = math.radians(eps0 + 0.00256 * math.cos(omega))
+    decl = math.asin(math.sin(eps) * math.sin(app_long))
+
+    y = math.tan(eps / 2) ** 2
+    eot = (y * math.sin(2 * l0) - 2 * e * math.sin(m)
+           + 4 * e * y * math.sin(m) * math.cos(2 * l0)
+           - 0.5 * y * y * math.sin(4 * l0) - 1.25 * e * e * math.sin(2 * m))
+    return decl, 4 * math.degrees(eot)
+
+
+def reference_times(lat, lon, d, altitude=-0.833):
+    """UTC (sunrise, sunset) of d in seconds since midnight, wrapped into the
+    day like sunrise_sunset(..., utc_offset=0), or (None, None) when the Sun
+    does not cross the altitude."""
+    jd0 = d.toordinal() + 1721424.5  # Julian day at 0h UTC
+    sin_h0 = math.sin(math.radians(altitude))
+    lat_rad = math.radians(lat)
+
+    times = []
+    for sign in (-1, 1):
+        minutes = 720 - 4 * lon  # start from mean solar noon
+        for _ in range(20):
+            decl, eot = _solar_position(jd0 + minutes / 1440)
+            cos_ha = (sin_h0 - math.sin(lat_rad) * math.sin(decl)) / (
+                math.cos(lat_rad) * math.cos(decl))
+            if not -1 <= cos_ha <= 1:
+                return None, None
+            ha = math.degrees(math.acos(cos_ha))
+            new = 720 - 4 * (lon - sign * ha) - eot
+            if abs(new - minutes) < 1e-5:
+                break
+            minutes = new
+        times.append(round(new * 60) % 86400)
+    return tuple(times)
+
+
+def write_reference(fname):
+    with open(fname, "w", newline="", encoding="utf-8") as fd:
+        fd.write("# Reference sunrise/sunset (UTC, h0 = -0.833 deg) for bench_sunrise_sunset.py.\n"
+                 "# Generated by: python bench_sunrise_sunset.py --write-reference\n"
+                 "# NOAA/Meeus solar position iterated at the event instant; empty when polar.\n")
+        writer = csv.writer(fd, lineterminator="\n")
+        writer.writerow(["lat", "lon", "date", "sunrise_utc", "sunset_utc"])
+        for lat, lon in REFERENCE_SITES:
+            for d in REFERENCE_DATES:
+                rise, sset = reference_times(lat, lon, d)
+                writer.writerow([lat, lon, d.isoformat(),
+                                 "" if rise is None else _hms(rise),
+                                 "" if sset is None else _hms(sset)])
+
+
+def read_reference(fname):
+    """Return [(lat, lon, date, rise_s, set_s)], times None when polar."""
+    rows = []
+    with open(fname, newline="", encoding="utf-8") as fd:
+        lines = (line for line in fd if not line.startswith("#"))
+        for row in csv.DictReader(lines):
+            rows.append((float(row["lat"]), float(row["lon"]),
+                         date.fromisoformat(row["date"]),
+                         _seconds(row["sunrise_utc"]), _seconds(row["sunset_utc"])))
+    return rows
+
+
+def _hms(s):
+    return f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}"
+
+
+def _seconds(hms):
+    if not hms:
+        return None
+    h, m, s = map(int, hms.split(":"))
+    return h * 3600 + m * 60 + s
+
+
+# ---------------------------------------------------------------------------
+# Measurements
+# ---------------------------------------------------------------------------
+
+def _error_stats(pairs):
+    """Summarize [(got_s, want_s)] as max/mean absolute error in seconds."""
+    errors = []
+    mismatches = 0
+    for got, want in pairs:
+        if (got is None) != (want is None):
+            mismatches += 1
+        elif got is not None:
+            diff = abs(got - want) % 86400
+            errors.append(min(diff, 86400 - diff))
+    return {
+        "points": len(pairs),
+        "max_error_s": max(errors) if errors else None,
+        "mean_error_s": round(statistics.fmean(errors), 3) if errors else None,
+        "polar_mismatches": mismatches,
+    }
+
+
+def accuracy(reference):
+    scalar = []
+    for lat, lon, d, rise, sset in reference:
+        r, s = sunrise_sunset(lat, lon, d, utc_offset=0)
+        scalar.append((r and r.hour * 3600 + r.minute * 60 + r.second, rise))
+        scalar.append((s and s.hour * 3600 + s.minute * 60 + s.second, sset))
+    result = {"reference": os.path.basename(REFERENCE), "scalar": _error_stats(scalar)}
+
+    try:
+        import numpy  # noqa: F401, needed by sunrise_sunset_batch()
+    except ImportError:
+        return result
+    from sunrise_sunset import sunrise_sunset_batch
+
+    lats, lons, dates, rises, sets = zip(*reference)
+    b_rise, b_set, _ = sunrise_sunset_batch(lats, lons, list(dates), utc_offset=0)
+    batch = []
+    for got_r, got_s, rise, sset in zip(b_rise.tolist(), b_set.tolist(), rises, sets):
+        batch.append((None if math.isnan(got_r) else int(got_r) % 86400, rise))
+        batch.append((None if math.isnan(got_s) else int(got_s) % 86400, sset))
+    result["batch"] = _error_stats(batch)
+    return result
+
+
+def throughput(n, seed):
+    rng = random.Random(seed)
+    start = date(2026, 1, 1)
+    lats = [rng.uniform(-70, 70) for _ in range(n)]
+    lons = [rng.uniform(-180, 180) for _ in range(n)]
+    dates = [start + timedelta(days=rng.randrange(365)) for _ in range(n)]
+
+    t0 = time.perf_counter()
+    for lat, lon, d in zip(lats, lons, dates):
+        sunrise_sunset(lat, lon, d, utc_offset=0)
+    scalar = time.perf_counter() - t0
+    result = {"evaluations": n, "scalar_per_s": round(n / scalar)}
+
+    try:
+        import numpy as np
+    except ImportError:
+        return result
+    from sunrise_sunset import sunrise_sunset_batch
+
+    lat_a, lon_a = np.array(lats), np.array(lons)
+    date_a = np.array(dates, dtype="datetime64[D]")
+    t0 = time.perf_counter()
+    sunrise_sunset_batch(lat_a, lon_a, date_a, utc_offset=0)
+    batch = time.perf_counter() - t0
+    result["batch_per_s"] = round(n / batch)
+    result["batch_speedup"] = round(scalar / batch, 2)
+    return result
+
+
+def startup(runs):
+    """Wall time of a CLI invocation, and of a bare interpreter for scale."""
+    def timed(cmd):
+        samples = []
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+            samples.append((time.perf_counter() - t0) * 1000)
+        return samples
+
+    cli = timed([sys.executable, SCRIPT, "40.7128", "-74.0060", "-d", "2026-02-10", "-u", "-5"])
+    bare = timed([sys.executable, "-c", "pass"])
+    return {
+        "runs": runs,
+        "cli_median_ms": round(statistics.median(cli), 2),
+        "cli_min_ms": round(min(cli), 2),
+        "python_median_ms": round(statistics.median(bare), 2),
+    }
+
+
+def compare(result, baseline, path=""):
+    """Relative change (new / old - 1) of every number present in both."""
+    changes = {}
+    for key, value in result.items():
+        old = baseline.get(key) if isinstance(baseline, dict) else None
+        name = f"{path}.{key}" if path else key
+        if isinstance(value, dict):
+            changes.update(compare(value, old, name))
+        elif (isinstance(value, (int, float)) and not isinstance(value, bool)
+              and isinstance(old, (int, float)) and old):
+            changes[name] = round(value / old - 1, 4)
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sunrise_sunset.py (JSON output).")
+    parser.add_argument("-n", type=int, default=10**6,
+                        help="Evaluations for the throughput runs (default: %(default)s)")
+    parser.add_argument("--quick", action="store_const", dest="n", const=10**5,
+                        help="Same as -n 100000, for a fast check")
+    parser.add_argument("--runs", type=int, default=20,
+                        help="CLI launches for the startup time (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("-o", "--output", metavar="FILE",
+                        help="Write the JSON here too (default: stdout only)")
+    parser.add_argument("--baseline", metavar="FILE",
+                        help="Previous JSON results to report relative changes against")
+    parser.add_argument("--write-reference", action="store_true",
+                        help=f"Regenerate {os.path.basename(REFERENCE)} and exit")
+    args = parser.parse_args()
+
+    if args.write_reference:
+        write_reference(REFERENCE)
+        return
+
+    result = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "throughput": throughput(args.n, args.seed),
+        "startup": startup(args.runs),
+        "accuracy": accuracy(read_reference(REFERENCE)),
+    }
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fd:
+            result["change_vs_baseline"] = compare(result, json.load(fd))
+
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fd:
+            fd.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,29 +15,20 @@
 
 import json
 import sys
-import xml.etree.ElementTree as ET
 from urllib.request import urlopen
 
+from kmlwriter import KMLWriter
+
 def main():
     response = urlopen('https://cirrus-locator-v2-stage.herokuapp.com/api/v1/asc')
     centers = json.loads(response.read())
 
     # Output
-    tree = ET.ElementTree()
-    kml = ET.Element('kml')
-    tree._setroot(kml)
-    doc = ET.SubElement(kml, 'Document')
-    ET.SubElement(doc, 'name').text = 'Service Centers'
-
-    for c in centers['data']:
-        place = ET.SubElement(doc, 'Placemark')
-        ET.SubElement(place, 'name').text = c['airport_name']
-        ET.SubElement(place, 'description').text = c['account_name']
-        point = ET.SubElement(place, 'Point')
-        ET.SubElement(point, 'coordinates').text = f"{c['longitude__c']},{c['latitude__c']}"
-
-    with open(sys.argv[1], 'wb') as fd:
-        tree.write(fd, xml_declaration=True)
+    with KMLWriter(sys.argv[1], 'Service Centers') as kml:
+        for c in centers['data']:
+            kml.placemark(c['airport_name'],
+                f"{c['longitude__c']},{c['latitude__c']}",
+                description=c['account_name'])
 
 if __name__ == '__main__':
     main()
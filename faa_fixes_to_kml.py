@@ -18,8 +18,14 @@
 import argparse
 import re
 import sys
-import xml.etree.ElementTree as ET
-from math import radians, cos, sin, asin, sqrt, degrees
+from math import radians, cos, sin, asin, sqrt, degrees, floor
+
+from kmlwriter import KMLWriter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 latLonRe = re.compile(r'^(\d+)-(\d+)-([\d\.]+)([NSWE])')
 
@@ -50,21 +56,10 @@ def haversine(lon1, lat1, lon2, lat2):
     c = 2 * asin(sqrt(a))
     return degrees(c) * 60
 
-def withinRadius(args, lat, lon):
-    return haversine(lon, lat, args.longitude, args.latitude) <= args.radius
-
-def main(args):
-    if (args.latitude and not args.longitude) or \
-            (args.longitude and not args.latitude):
-        fatal('Latitude and longitude must be passed together')
-
-    tree = ET.ElementTree()
-    kml = ET.Element('kml')
-    tree._setroot(kml)
-    doc = ET.SubElement(kml, 'Document')
-    ET.SubElement(doc, 'name').text = 'FIXES'
-
-    with open(args.file, 'r', encoding='ascii') as f:
+def readFixes(fname):
+    # Decode every FIX1 record into (name, lat, lon)
+    fixes = []
+    with open(fname, 'r', encoding='ascii') as f:
         for line in f:
             if not line.startswith('FIX1'):
                 continue
@@ -73,29 +68,210 @@ def main(args):
             name = line[4:34].strip()
             lat = decCoord(line[66:80])
             lon = decCoord(line[80:94])
+            fixes.append((name, lat, lon))
+
+    return fixes
+
+def wrapCol(col, size):
+    # Fold a longitude bin onto the -180..180 range
+    cols = round(360 / size)
+    return (col + cols // 2) % cols - cols // 2
+
+def gridCell(lat, lon, size):
+    return floor(lat / size), wrapCol(floor(lon / size), size)
+
+def buildGrid(fixes, size):
+    # Bin fixes into size x size degree cells: {(row, col): [fix index]}
+    grid = {}
+    for i, (_, lat, lon) in enumerate(fixes):
+        grid.setdefault(gridCell(lat, lon, size), []).append(i)
+    return grid
+
+def searchBox(lat, lon, radius):
+    # Bounding box of radius (nm) around lat/lon: (south, north, dlon)
+    dlat = radius / 60
+    south = max(-90, lat - dlat)
+    north = min(90, lat + dlat)
+
+    # Longitude degrees shrink with latitude; use the widest edge of the box
+    widest = max(abs(south), abs(north))
+    if widest >= 90:
+        dlon = 180
+    else:
+        dlon = min(180, dlat / cos(radians(widest)))
+
+    return south, north, dlon
+
+def cellsNear(size, lat, lon, radius):
+    # Grid cells overlapping the bounding box of radius (nm) around lat/lon
+    south, north, dlon = searchBox(lat, lon, radius)
+    cells = {}
+    for row in range(floor(south / size), floor(north / size) + 1):
+        for col in range(floor((lon - dlon) / size), floor((lon + dlon) / size) + 1):
+            # Wrap around the antimeridian
+            cells[row, wrapCol(col, size)] = None
+    return list(cells)
+
+def fixesNear(grid, size, fixes, lat, lon, radius):
+    # Yield indexes of fixes within radius (nm) of lat/lon. Only grid cells
+    # overlapping the bounding box are visited, and only fixes inside the
+    # box get the exact haversine check.
+    south, north, dlon = searchBox(lat, lon, radius)
+    for cell in cellsNear(size, lat, lon, radius):
+        for i in grid.get(cell, ()):
+            _, flat, flon = fixes[i]
+            if not south <= flat <= north:
+                continue
+            if abs((flon - lon + 180) % 360 - 180) > dlon:
+                continue
+            if haversine(flon, flat, lon, lat) <= radius:
+                yield i
 
-            if args.latitude and not withinRadius(args, lat, lon):
+def decCoordsArray(cols):
+    # Vectorized decCoord() over an (N, width) uint8 array of DD-MM-SS.SSH
+    # fields. Walks the columns once, accumulating degrees, minutes and
+    # seconds digits for all rows at the same time. Seconds are kept as an
+    # integer plus a power-of-ten divisor so the result is bit-identical to
+    # float() on the text.
+    n = len(cols)
+    parts = [np.zeros(n), np.zeros(n), np.zeros(n)]
+    part = np.zeros(n, dtype=np.int8)
+    scale = np.ones(n)
+    frac = np.zeros(n, dtype=bool)
+    south = np.zeros(n, dtype=bool)
+
+    for c in np.ascontiguousarray(cols.T):
+        value = c.astype(np.float64) - ord('0')
+        digit = (value >= 0) & (value <= 9)
+        for i in range(3):
+            hit = digit & (part == i)
+            parts[i] = np.where(hit, parts[i] * 10 + value, parts[i])
+        scale = np.where(digit & frac, scale * 10, scale)
+        frac |= c == ord('.')
+        part += c == ord('-')
+        south |= (c == ord('S')) | (c == ord('W'))
+
+    deg, min, sec = parts
+    coord = deg + (min / 60) + (sec / scale / 3600)
+    return np.where(south, -coord, coord)
+
+def readFixesArray(fname):
+    # Bulk version of readFixes(): (FIX1 records, lat array, lon array).
+    # Names are left in the raw records; only the selected ones get decoded.
+    with open(fname, 'rb') as f:
+        lines = [l for l in f if l.startswith(b'FIX1')]
+
+    coords = b''.join(l[66:94].ljust(28) for l in lines)
+    cols = np.frombuffer(coords, dtype=np.uint8).reshape(len(lines), 28)
+
+    return lines, decCoordsArray(cols[:, :14]), decCoordsArray(cols[:, 14:])
+
+def withinRadiusArray(lat, lon, centers, radius):
+    # Boolean mask of fixes within radius (nm) of any center
+    lat1 = np.radians(lat)
+    lon1 = np.radians(lon)
+    mask = np.zeros(len(lat), dtype=bool)
+    for clat, clon in centers:
+        lat2 = radians(clat)
+        a = np.sin((lat2 - lat1) / 2) ** 2 + \
+            np.cos(lat1) * cos(lat2) * np.sin((radians(clon) - lon1) / 2) ** 2
+        mask |= np.degrees(2 * np.arcsin(np.sqrt(a))) * 60 <= radius
+    return mask
+
+def buildGridArray(lat, lon, size):
+    # Vectorized buildGrid(): {(row, col): array of fix indexes}
+    cols = round(360 / size)
+    row = np.floor(lat / size).astype(np.int64)
+    col = (np.floor(lon / size).astype(np.int64) + cols // 2) % cols - cols // 2
+    if not len(row):
+        return {}
+
+    # Sort by cell and split where the cell changes
+    order = np.lexsort((col, row))
+    row = row[order]
+    col = col[order]
+    starts = np.flatnonzero((row[1:] != row[:-1]) | (col[1:] != col[:-1])) + 1
+    cells = zip(row[0:1].tolist() + row[starts].tolist(),
+                col[0:1].tolist() + col[starts].tolist())
+    return dict(zip(cells, np.split(order, starts)))
+
+def selectVectorized(fname, centers, radius, size):
+    lines, lat, lon = readFixesArray(fname)
+    if centers:
+        # The grid narrows each center down to the fixes in nearby cells;
+        # only those get the exact distance test
+        grid = buildGridArray(lat, lon, size)
+        mask = np.zeros(len(lines), dtype=bool)
+        for clat, clon in centers:
+            cells = [grid[c] for c in cellsNear(size, clat, clon, radius) if c in grid]
+            if not cells:
                 continue
+            near = np.concatenate(cells)
+            mask[near] |= withinRadiusArray(lat[near], lon[near], [(clat, clon)], radius)
+        wanted = np.flatnonzero(mask)
+    else:
+        wanted = range(len(lines))
+
+    lat = lat.tolist()
+    lon = lon.tolist()
+    return [(lines[i][4:34].strip().decode('ascii'), lat[i], lon[i]) for i in wanted]
+
+def selectScalar(fname, centers, radius, size):
+    fixes = readFixes(fname)
+    if not centers:
+        return fixes
+
+    grid = buildGrid(fixes, size)
+    wanted = set()
+    for lat, lon in centers:
+        wanted.update(fixesNear(grid, size, fixes, lat, lon, radius))
+
+    # Keep the order of the FAA file
+    return [fixes[i] for i in sorted(wanted)]
+
+def parseCenter(s):
+    try:
+        lat, lon = (float(v) for v in s.split(','))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'expected LAT,LON, got {s!r}')
+    return lat, lon
+
+def main(args):
+    if (args.latitude is None) != (args.longitude is None):
+        fatal('Latitude and longitude must be passed together')
+
+    centers = list(args.center or [])
+    if args.latitude is not None:
+        centers.append((args.latitude, args.longitude))
 
-            place = ET.SubElement(doc, 'Placemark')
-            ET.SubElement(place, 'name').text = name
-            point = ET.SubElement(place, 'Point')
-            ET.SubElement(point, 'coordinates').text = '{},{}'.format(lon, lat)
+    if np is not None and not args.scalar:
+        fixes = selectVectorized(args.file, centers, args.radius, args.grid)
+    else:
+        fixes = selectScalar(args.file, centers, args.radius, args.grid)
 
-    tree.write(args.output, xml_declaration=True)
+    with KMLWriter(args.output, 'FIXES') as kml:
+        for name, lat, lon in fixes:
+            kml.placemark(name, '{},{}'.format(lon, lat))
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(
         description='Convert fixes/waypoints from the FAA format to KML',
         epilog='Get current databases at https://nfdc.faa.gov')
     parser.add_argument('file', help='FAA FIX.txt file')
-    parser.add_argument('output', help='KML output file')
+    parser.add_argument('output', help='KML output file (.kml, .kml.gz or .kmz)')
 
     parser.add_argument('--latitude', type=float,
         help='eg: 37.61946088067242 (KSFO)')
     parser.add_argument('--longitude', type=float,
         help='eg: -122.3738855647427 (KSFO)')
+    parser.add_argument('--center', type=parseCenter, action='append',
+        metavar='LAT,LON',
+        help='Include fixes around this point; may be repeated')
     parser.add_argument('--radius', type=int, default=50,
         help='Radius in nautical miles from location to include [%(default)s]')
+    parser.add_argument('--grid', type=float, default=1.0,
+        help='Spatial index cell size in degrees [%(default)s]')
+    parser.add_argument('--scalar', action='store_true',
+        help='Decode line by line even when NumPy is available')
 
     main(parser.parse_args())
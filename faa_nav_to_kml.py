@@ -19,65 +19,73 @@ import argparse
 import pdb
 import re
 import sys
-import xml.etree.ElementTree as ET
 from math import radians, cos, sin, asin, sqrt, degrees
 
-# Namespaces
-AIXM = '{http://www.aixm.aero/schema/5.1}'
-GML = '{http://www.opengis.net/gml/3.2}'
+from aixm import AIXM, GML, iter_members
+from kmlwriter import KMLWriter
 
 def fatal(msg):
     print(msg, file=sys.stderr)
     sys.exit(1)
 
-def strip(s):
-    return s[s.find('}')+1:]
+# Tags looked up in every Navaid, qualified once up front
+NAVAID = AIXM + 'Navaid'
+DESIGNATOR = AIXM + 'designator'
+POS = GML + 'pos'
+NAME = AIXM + 'name'
+TYPE = AIXM + 'type'
+FIELDS = (DESIGNATOR, POS, NAME, TYPE)
+
+def typeList(s):
+    return set(t.strip() for t in s.split(',') if t.strip())
+
+def navaid(member, wanted):
+    # Walk the member once and pick the first designator, pos, name and
+    # type, like findall('.//...')[0] would. Returns None for incomplete
+    # navaids and for unwanted types, as soon as the type is known.
+    found = {}
+    for e in member.iter():
+        tag = e.tag
+        if tag in FIELDS and tag not in found:
+            if tag == TYPE and not wanted(e.text):
+                return None
+            found[tag] = e.text
+            if len(found) == len(FIELDS):
+                return tuple(found[f] for f in FIELDS)
+
+    return None
+
+def iterNavaids(fname, wanted):
+    # Stream (designator, pos, name, type) out of the AIXM file
+    for member in iter_members(fname):
+        if len(member) and member[0].tag == NAVAID:
+            aid = navaid(member, wanted)
+            if aid:
+                yield aid
 
 def main(args):
-    # Input
-    inXml = ET.parse(args.file)
-    inRoot = inXml.getroot()
+    if args.types:
+        wanted = lambda typ: typ in args.types
+    else:
+        wanted = lambda typ: typ not in args.skip_types
 
     # Output
-    tree = ET.ElementTree()
-    kml = ET.Element('kml')
-    tree._setroot(kml)
-    doc = ET.SubElement(kml, 'Document')
-    ET.SubElement(doc, 'name').text = 'NAV'
-
-    for member in inRoot:
-        aid = member[0]
-        aidType = strip(aid.tag)
-
-        if aidType == 'Navaid':
-
-            try:
-                des = member.findall('.//' + AIXM + 'designator')[0].text
-                pos = member.findall('.//' + GML + 'pos')[0].text
-                name = member.findall('.//' + AIXM + 'name')[0].text
-                typ = member.findall('.//' + AIXM + 'type')[0].text
-
-            except IndexError:
-                continue
-
-            # Skip unwanted types
-            if typ in ('OTHER:VOT', 'TACAN'):
-                continue
-
-            place = ET.SubElement(doc, 'Placemark')
-            ET.SubElement(place, 'name').text = des
-            ET.SubElement(place, 'description').text = \
-                '{}\n{}'.format(name, typ)
-            point = ET.SubElement(place, 'Point')
-            ET.SubElement(point, 'coordinates').text = pos.replace(' ', ',')
-
-    tree.write(args.output, xml_declaration=True)
+    with KMLWriter(args.output, 'NAV') as kml:
+        for des, pos, name, typ in iterNavaids(args.file, wanted):
+            kml.placemark(des, pos.replace(' ', ','),
+                description='{}\n{}'.format(name, typ))
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(
         description='Convert NAV data from the FAA format to KML',
         epilog='Get current databases at https://nfdc.faa.gov')
     parser.add_argument('file', help='FAA NAV_AIXM.xml file')
-    parser.add_argument('output', help='KML output file')
+    parser.add_argument('output', help='KML output file (.kml, .kml.gz or .kmz)')
+    types = parser.add_mutually_exclusive_group()
+    types.add_argument('--types', type=typeList, metavar='LIST',
+        help='Only include these comma-separated navaid types, eg: VOR,VORTAC')
+    types.add_argument('--skip-types', type=typeList, metavar='LIST',
+        default=typeList('OTHER:VOT,TACAN'),
+        help='Navaid types to leave out [OTHER:VOT,TACAN]')
 
     main(parser.parse_args())
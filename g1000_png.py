@@ -1,14 +1,48 @@
 #!/opt/homebrew/bin/python3.7
 
 import argparse
+import io
 import os
+import shutil
+import subprocess
 import sys
+import time
 
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
 from PIL import Image, ImageDraw, ImageFont
 from multiprocessing import Pool, cpu_count
 
+FONT = '/Library/Fonts/Courier New Bold.ttf'
+GREEN = (0, 255, 0)
+
 args = None
+
+# Per-worker state, set up once by initWorker()
+font = None
+canvas = None
+draw = None
+
+# NumPy renderer state (--numpy): the frame buffer, the static parts it is
+# restored from, the (y0, y1, x0, x1) areas drawn since the last restore,
+# a frame of solid GREEN to copy bars from (much faster than filling with a
+# pixel value), and GREEN for blending
+np = None
+frame = None
+background = None
+dirty = []
+solid = None
+ink = None
+
+# Static labels of the EGT view
+EGT_LABELS = (
+    ((1765, 480), 'MAP'),
+    ((1665, 480), ' FF'),
+    ((1665, 780), 'EGT'),
+    ((1665, 980), 'CHT'),
+)
+
 keys = [
     'Lcl Date',
     'Lcl Time',
@@ -91,49 +125,146 @@ keys = [
     'HPLfd',
     'VPLwas',
 ]
-queue = []
+
+# Only the columns actually rendered by process() and processEGT() are kept,
+# so rows stay small when they are pickled to the workers
+rendered = [
+    'Lcl Date',
+    'Lcl Time',
+    'Latitude',
+    'Longitude',
+    'AltInd',
+    'BaroA',
+    'OAT',
+    'IAS',
+    'GndSpd',
+    'VSpd',
+    'HDG',
+    'TRK',
+    'TAS',
+    'E1 FFlow',
+    'E1 MAP',
+    'E1 RPM',
+    'E1 %Pwr',
+    'E1 CHT1',
+    'E1 CHT2',
+    'E1 CHT3',
+    'E1 CHT4',
+    'E1 EGT1',
+    'E1 EGT2',
+    'E1 EGT3',
+    'E1 EGT4',
+]
+columns = [(k, keys.index(k)) for k in rendered]
 
 def readCSV(name):
     log(f'Parsing {name}')
     with open(name, 'r', encoding='ascii') as f:
         for line in f:
-            parse(line.strip())
+            data = parse(line.strip())
+            if data is not None:
+                yield data
 
 def parse(line):
     if not line.startswith('2'):
-        return
+        return None
 
     fields = line.split(',')
-    data = {}
-
-    try:
-        for i in range(len(keys)):
-            data[keys[i]] = fields[i].strip()
-
-    except IndexError:
-        return
+    if len(fields) < len(keys):
+        return None
 
-    queue.append(data)
+    return {k: fields[i].strip() for k, i in columns}
 
-def preProcess():
-    # Pre-process the sequence to compute flight time
+def preProcess(rows):
+    # Compute flight time incrementally as rows stream by
     # Add sequence number for image generation
 
-    log('Pre-processing data')
-
     flightTime = 0
-    for i in range(len(queue)):
-        queue[i]['i'] = i
-        ias = intOrZero(queue[i]['IAS'])
+    for i, data in enumerate(rows):
+        data['i'] = i
+        ias = intOrZero(data['IAS'])
         if ias > 60:
             flightTime += 1
-        queue[i]['X-FlightTime'] = getTimeStr(flightTime)
-
-def process(data):
+        data['X-FlightTime'] = getTimeStr(flightTime)
+        yield data
+
+def batches(rows, size):
+    # Pool.imap() drains its whole input up front, so hand it bounded
+    # slices of the stream instead of the stream itself
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+def initWorker(a):
+    # Parse the font and allocate the frame buffer once per process
+    global args, font, canvas, draw
+    args = a
+    font = ImageFont.truetype(FONT, 14)
+    canvas = Image.new('RGB', (args.width, args.height))
+    draw = ImageDraw.Draw(canvas)
+    if args.numpy:
+        initNumpy()
+
+def initNumpy():
+    # Render the static parts once; every frame starts from them. The labels
+    # go under the bars rather than over them as in processEGT(), which
+    # looks the same since both are solid GREEN
+    global np, frame, background, solid, ink
+    import numpy
+    np = numpy
+    ink = np.array(GREEN, dtype=np.uint16)
+    for xy, text in EGT_LABELS:
+        draw.text(xy, text, fill=GREEN, font=font)
+    background = np.array(canvas)
+    frame = background.copy()
+    solid = np.empty_like(frame)
+    solid[...] = GREEN
+
+def clear():
+    canvas.paste((0, 0, 0), (0, 0, args.width, args.height))
+
+def writeFrame(i, label, start):
+    # Returns (sequence number, raw RGB frame or None, time split), where the
+    # time split is (draw, encode, save) for this frame
+    drawn = time.perf_counter()
+
+    if args.mp4:
+        # The main process pipes the raw frame to ffmpeg, in order
+        raw = canvas.tobytes() if frame is None else frame.tobytes()
+        log(label)
+        return i, raw, (drawn - start, time.perf_counter() - drawn, 0.0)
+
+    buf = io.BytesIO()
+    image = canvas if frame is None else Image.fromarray(frame)
+    image.save(buf, 'PNG')
+    encoded = time.perf_counter()
+
+    # A rerun into the same directory finds frames hard-linked together by
+    # reusePNG(); writing through one of them would change them all, so
+    # the new file replaces the link instead
+    name = pngName(i)
+    with open(name + '.tmp', 'wb') as f:
+        f.write(buf.getbuffer())
+    os.replace(name + '.tmp', name)
+    saved = time.perf_counter()
+
+    log(label)
+    return i, None, (drawn - start, encoded - drawn, saved - encoded)
+
+def pngName(i):
+    return args.outdir + f'/{i:06d}.png'
+
+# Formatters run in the main process and return everything a frame shows,
+# so identical consecutive frames can be spotted before they are rendered
+
+def formatText(data):
     gps = getLatLon(data['Latitude'], data['Longitude'])
     power = int(float(data['E1 %Pwr']) * 100)
 
-    text = f'''{data['Lcl Date']} {data['Lcl Time']}
+    return f'''{data['Lcl Date']} {data['Lcl Time']}
 IAS / TAS / GS: {intOrZero(data['IAS'])} / {intOrZero(data['TAS'])} / {intOrZero(data['GndSpd'])}
 ALT / BARO: {intOrZero(data['AltInd'])} / {data['BaroA']}
 VS: {intOrZero(data['VSpd'])}
@@ -144,65 +275,167 @@ PWR / MAP / RPM: {power}% / {data['E1 MAP']} / {intOrZero(data['E1 RPM'])}
 FLT TIME: {data['X-FlightTime']}
 '''
 
-    img = Image.new('RGB', (args.width, args.height))
-    fnt = ImageFont.truetype('/Library/Fonts/Courier New Bold.ttf', 14)
-    d = ImageDraw.Draw(img)
-    d.text((10, 10), text, fill=(0, 255, 0), font=fnt)
+def formatEGT(data):
+    egts = (
+        intOrZero(data['E1 EGT1']),
+        intOrZero(data['E1 EGT2']),
+        intOrZero(data['E1 EGT3']),
+        intOrZero(data['E1 EGT4']),
+    )
 
-    img.save(args.outdir + f'/{data["i"]:06d}.png')
+    chts = (
+        intOrZero(data['E1 CHT1']),
+        intOrZero(data['E1 CHT2']),
+        intOrZero(data['E1 CHT3']),
+        intOrZero(data['E1 CHT4']),
+    )
 
-    log(data['Lcl Date'] + ' ' + data['Lcl Time'])
+    ff = floatOrZero(data['E1 FFlow'])
+    mp = floatOrZero(data['E1 MAP'])
 
-def processEGT(data):
-    img = Image.new('RGB', (args.width, args.height))
-    fnt = ImageFont.truetype('/Library/Fonts/Courier New Bold.ttf', 14)
-    d = ImageDraw.Draw(img)
+    return egts, chts, ff, mp
 
-    egts = []
-    egts.append(intOrZero(data['E1 EGT1']))
-    egts.append(intOrZero(data['E1 EGT2']))
-    egts.append(intOrZero(data['E1 EGT3']))
-    egts.append(intOrZero(data['E1 EGT4']))
+# Renderers run in the workers; a job is (sequence number, log label, content)
 
-    chts = []
-    chts.append(intOrZero(data['E1 CHT1']))
-    chts.append(intOrZero(data['E1 CHT2']))
-    chts.append(intOrZero(data['E1 CHT3']))
-    chts.append(intOrZero(data['E1 CHT4']))
+def process(job):
+    i, label, text = job
+    start = time.perf_counter()
 
+    clear()
+    draw.text((10, 10), text, fill=GREEN, font=font)
+
+    return writeFrame(i, label, start)
+
+def egtLayout(egts, chts, ff, mp):
+    # The variable parts of the EGT view in drawing order, as
+    # ('bar', ((x0, y0), (x1, y1))) and ('text', (x, y), string)
+
+    # Bars grow upwards from y, so the top corner comes first
     x, y = 1700, 800
     for egt in egts:
         bar = max(0, egt - 1100) // 2
-        d.rectangle(((x, y), (x + 20, y - bar)), fill=(0, 255, 0))
-        d.text((x, y + 10), str(egt), fill=(0, 255, 0), font=fnt)
+        yield 'bar', ((x, y - bar), (x + 20, y))
+        yield 'text', (x, y + 10), str(egt)
 
         x += 40
 
     x, y = 1700, 1000
     for cht in chts:
         bar = max(0, cht - 200) // 2
-        d.rectangle(((x, y), (x + 20, y - bar)), fill=(0, 255, 0))
-        d.text((x, y + 10), str(cht), fill=(0, 255, 0), font=fnt)
+        yield 'bar', ((x, y - bar), (x + 20, y))
+        yield 'text', (x, y + 10), str(cht)
 
         x += 40
 
-    ff = floatOrZero(data['E1 FFlow'])
-    mp = floatOrZero(data['E1 MAP'])
+    yield 'bar', ((1700, 500 - max(0, ff * 6)), (1720, 500))
+    yield 'text', (1700, 510), str(ff)
+
+    yield 'bar', ((1800, 500 - max(0, mp * 4)), (1820, 500))
+    yield 'text', (1800, 510), str(mp)
 
-    d.rectangle(((1700, 500), (1720, 500 - (ff * 6))), fill=(0, 255, 0))
-    d.text((1700, 510), str(ff), fill=(0, 255, 0), font=fnt)
+def processEGT(job):
+    i, label, content = job
+    start = time.perf_counter()
+    clear()
 
-    d.rectangle(((1800, 500), (1820, 500 - (mp * 4))), fill=(0, 255, 0))
-    d.text((1800, 510), str(mp), fill=(0, 255, 0), font=fnt)
+    for kind, xy, *text in egtLayout(*content):
+        if kind == 'bar':
+            draw.rectangle(xy, fill=GREEN)
+        else:
+            draw.text(xy, text[0], fill=GREEN, font=font)
 
     # Labels
-    d.text((1765, 480), 'MAP', fill=(0, 255, 0), font=fnt)
-    d.text((1665, 480), ' FF', fill=(0, 255, 0), font=fnt)
-    d.text((1665, 780), 'EGT', fill=(0, 255, 0), font=fnt)
-    d.text((1665, 980), 'CHT', fill=(0, 255, 0), font=fnt)
+    for xy, text in EGT_LABELS:
+        draw.text(xy, text, fill=GREEN, font=font)
+
+    return writeFrame(i, label, start)
+
+def processEGTNumpy(job):
+    # Same frame as processEGT(), composed in a NumPy buffer: only the areas
+    # drawn for the previous frame are reset, bars are copied from a solid
+    # buffer and the readouts from cached pre-rendered patches
+    i, label, content = job
+    start = time.perf_counter()
+
+    for y0, y1, x0, x1 in dirty:
+        frame[y0:y1, x0:x1] = background[y0:y1, x0:x1]
+    dirty.clear()
+
+    for kind, xy, *text in egtLayout(*content):
+        if kind == 'bar':
+            fillBar(xy)
+        else:
+            drawText(xy, text[0])
+
+    return writeFrame(i, label, start)
+
+def clip(y0, y1, x0, x1):
+    # Intersect an area with the frame, None if nothing is left
+    y0, x0 = max(y0, 0), max(x0, 0)
+    y1, x1 = min(y1, args.height), min(x1, args.width)
+    if y0 >= y1 or x0 >= x1:
+        return None
+    return y0, y1, x0, x1
+
+def fillBar(box):
+    # Like draw.rectangle(): corners inclusive, coordinates truncated
+    (x0, y0), (x1, y1) = box
+    area = clip(int(y0), int(y1) + 1, int(x0), int(x1) + 1)
+    if area:
+        y0, y1, x0, x1 = area
+        frame[y0:y1, x0:x1] = solid[y0:y1, x0:x1]
+        dirty.append(area)
+
+def drawText(xy, text):
+    area, alpha, patch = textPatch(xy, text)
+    if area is None:
+        return
 
-    img.save(args.outdir + f'/{data["i"]:06d}.png')
-    log(data['Lcl Date'] + ' ' + data['Lcl Time'])
+    y0, y1, x0, x1 = area
+    out = frame[y0:y1, x0:x1]
+    for a0, a1, b0, b1 in dirty:
+        if a0 < y1 and y0 < a1 and b0 < x1 and x0 < b1:
+            # Drawn over something from this frame, blend it in
+            out[...] = blend(out, alpha)
+            break
+    else:
+        out[...] = patch
+    dirty.append(area)
+
+def blend(under, alpha):
+    # The text blending of PIL, (under * (255 - alpha) + ink * alpha) / 255
+    # rounded the way its DIV255 does
+    out = under * (255 - alpha) + ink * alpha + 128
+    out += out >> 8
+    return (out >> 8).astype(np.uint8)
+
+@lru_cache(maxsize=8192)
+def textPatch(xy, text):
+    # Readouts repeat a lot, so each one is rasterized once per worker and
+    # position: its clipped frame area, its alpha there, and the text
+    # already blended over the background, which is what is under it unless
+    # another shape of the same frame overlaps
+    left, top, right, bottom = font.getbbox(text)
+    mask = Image.new('L', (max(1, right - left), max(1, bottom - top)))
+    ImageDraw.Draw(mask).text((-left, -top), text, fill=255, font=font)
+
+    x, y = xy[0] + left, xy[1] + top
+    area = clip(y, y + mask.height, x, x + mask.width)
+    if area is None:
+        return None, None, None
+    y0, y1, x0, x1 = area
+    alpha = np.asarray(mask, dtype=np.uint16)[y0 - y:y1 - y, x0 - x:x1 - x, None]
+    return area, alpha, blend(background[y0:y1, x0:x1], alpha)
+
+def reusePNG(src, dst):
+    # Hard-link the previous frame, falling back to a copy
+    dst = pngName(dst)
+    if os.path.exists(dst):
+        os.unlink(dst)
+    try:
+        os.link(pngName(src), dst)
+    except OSError:
+        shutil.copyfile(pngName(src), dst)
 
 def log(msg):
     print(msg)
@@ -249,6 +482,44 @@ def floatOrZero(n):
     except ValueError:
         return 0
 
+def releaseFrames(pending, expected, last):
+    # Frames finish out of order; pending holds them, by sequence number,
+    # until their turn comes. None stands for a repeat of the previous
+    # frame. Pops the run that is next in line and returns it, in order,
+    # with the new expected sequence number and last frame.
+    ready = []
+    while expected in pending:
+        raw = pending.pop(expected)
+        if raw is None:
+            raw = last
+        ready.append(raw)
+        last = raw
+        expected += 1
+    return ready, expected, last
+
+def feedFFmpeg(ffmpeg, frames):
+    # False once ffmpeg has exited and stopped reading
+    try:
+        for raw in frames:
+            ffmpeg.stdin.write(raw)
+    except BrokenPipeError:
+        return False
+    return True
+
+def startFFmpeg():
+    # One log row per second of flight, resampled to a standard frame rate
+    cmd = [
+        'ffmpeg', '-y', '-loglevel', 'error',
+        '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+        '-s', f'{args.width}x{args.height}', '-r', '1', '-i', '-',
+        '-pix_fmt', 'yuv420p', '-r', '29.97', args.mp4,
+    ]
+    try:
+        return subprocess.Popen(cmd, stdin=subprocess.PIPE)
+    except OSError as e:
+        err(f'Cannot run ffmpeg: {e}')
+        sys.exit(1)
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -257,24 +528,123 @@ def main():
     parser.add_argument('log', help='Data log file')
     parser.add_argument('--outdir', default=os.getcwd(),
         help='Output directory [%(default)s]')
-    parser.add_argument('--width', default=1920,
+    parser.add_argument('--width', type=int, default=1920,
         help='Image width [%(default)s]')
-    parser.add_argument('--height', default=1080,
+    parser.add_argument('--height', type=int, default=1080,
         help='Image height [%(default)s]')
     parser.add_argument('--egt', action='store_true',
         help='Render in EGT mode')
+    parser.add_argument('--chunksize', type=int, default=32,
+        help='Rows sent to a worker at a time [%(default)s]')
+    parser.add_argument('--profile', action='store_true',
+        help='Report per-frame time spent drawing, encoding and saving')
+    parser.add_argument('--mp4', metavar='OUTPUT',
+        help='Pipe frames straight into ffmpeg instead of writing PNGs')
+    parser.add_argument('--numpy', action='store_true',
+        help='Compose EGT frames in a NumPy buffer instead of PIL drawing calls')
     global args
     args = parser.parse_args()
+    if args.numpy and not args.egt:
+        parser.error('--numpy needs --egt')
 
-    readCSV(args.log)
-    preProcess()
     cpus = cpu_count()
     log(f'Using {cpus} CPUs')
 
-    handler = processEGT if args.egt else process
-
-    with Pool(cpus) as p:
-        p.map(handler, queue)
+    if args.egt:
+        formatter = formatEGT
+        handler = processEGTNumpy if args.numpy else processEGT
+    else:
+        formatter, handler = formatText, process
+
+    rows = preProcess(readCSV(args.log))
+
+    # Raw frames are ~6 MB each, so keep fewer of them in flight
+    if args.mp4:
+        ffmpeg = startFFmpeg()
+        chunksize, window = 1, cpus * 4
+    else:
+        ffmpeg = None
+        chunksize, window = args.chunksize, args.chunksize * cpus * 4
+
+    frames = 0
+    reused = 0
+    totals = [0.0, 0.0, 0.0]
+
+    # Raw frames waiting for their turn to go to ffmpeg, see releaseFrames()
+    pending = {}
+    feeding = True
+    expected = 0
+    last = None
+    previous = None
+
+    with Pool(cpus, initializer=initWorker, initargs=(args,)) as p:
+        for batch in batches(rows, window):
+            jobs = []
+            links = []
+            for data in batch:
+                content = formatter(data)
+                if content == previous:
+                    reused += 1
+                    if ffmpeg:
+                        pending[data['i']] = None
+                    else:
+                        links.append((data['i'] - 1, data['i']))
+                    continue
+
+                previous = content
+                label = data['Lcl Date'] + ' ' + data['Lcl Time']
+                jobs.append((data['i'], label, content))
+
+            for seq, raw, split in p.imap_unordered(handler, jobs, chunksize):
+                frames += 1
+                for i in range(3):
+                    totals[i] += split[i]
+
+                if ffmpeg and feeding:
+                    pending[seq] = raw
+                    ready, expected, last = releaseFrames(pending, expected, last)
+                    feeding = feedFFmpeg(ffmpeg, ready)
+
+            # Sources are on disk once the whole batch is rendered
+            for src, dst in links:
+                reusePNG(src, dst)
+
+            # Repeats at the end of the batch have nothing left to wait for
+            if ffmpeg and feeding:
+                ready, expected, last = releaseFrames(pending, expected, last)
+                feeding = feedFFmpeg(ffmpeg, ready)
+
+            # Stop between batches: terminating the pool while it is still
+            # handing out tasks can deadlock
+            if not feeding:
+                break
+
+    seen = frames + reused
+    if seen:
+        log(f'Reused {reused} of {seen} frames ({reused / seen:.1%})')
+
+    if ffmpeg:
+        try:
+            ffmpeg.stdin.close()
+        except BrokenPipeError:
+            pass
+        if not feeding:
+            # Its own message says why
+            err(f'ffmpeg exited early with status {ffmpeg.wait()}')
+            sys.exit(1)
+        if ffmpeg.wait() != 0:
+            err(f'ffmpeg exited with status {ffmpeg.returncode}')
+            sys.exit(1)
+
+    if args.profile and frames:
+        total = sum(totals)
+        log(f'Profile over {frames} frames (per frame, all workers):')
+        for name, t in zip(('draw', 'encode', 'save'), totals):
+            log(f'  {name:<6} {t / frames * 1000:8.2f} ms  {t / total:6.1%}')
+
+    if ffmpeg:
+        log(f'Wrote {args.mp4}')
+        return
 
     print('Create the mp4 sequence with:')
     print(f"ffmpeg -r 1 -f image2 -i '%06d.png' -s {args.width}x{args.height} -pix_fmt yuv420p -r 29.97 g1000.mp4")
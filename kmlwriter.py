@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+# Incremental KML writer shared by the KML-producing scripts
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Placemarks are written as soon as they are produced instead of being
+# collected in an ElementTree first, so memory does not grow with the number
+# of placemarks. The output is gzip-compressed when the file name ends in
+# .gz, and stored as doc.kml inside a KMZ archive when it ends in .kmz.
+#
+#   with KMLWriter('out.kml', 'Airports') as kml:
+#       kml.placemark('KSFO', '-122.375,37.619', description='San Francisco')
+
+import gzip
+import io
+import zipfile
+from xml.sax.saxutils import escape, quoteattr
+
+KML_NS = 'http://www.opengis.net/kml/2.2'
+
+def _text(value):
+    # Element text, with None written as an empty element like ElementTree
+    return '' if value is None else escape(str(value))
+
+class KMLWriter:
+    def __init__(self, fname, name=None):
+        self.count = 0
+        self._zip = None
+
+        if fname.endswith('.kmz'):
+            self._zip = zipfile.ZipFile(fname, 'w', zipfile.ZIP_DEFLATED)
+            self._fd = io.TextIOWrapper(self._zip.open('doc.kml', 'w'),
+                encoding='utf-8')
+        elif fname.endswith('.gz'):
+            self._fd = gzip.open(fname, 'wt', encoding='utf-8')
+        else:
+            self._fd = open(fname, 'w', encoding='utf-8')
+
+        self._fd.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        self._fd.write(f'<kml xmlns={quoteattr(KML_NS)}>\n<Document>\n')
+        if name is not None:
+            self._fd.write(f'  <name>{_text(name)}</name>\n')
+
+    def placemark(self, name, coordinates, description=None):
+        # coordinates is the KML "lon,lat[,alt]" text
+        out = ['  <Placemark>\n', f'    <name>{_text(name)}</name>\n']
+        if description is not None:
+            out.append(f'    <description>{_text(description)}</description>\n')
+        out.append(f'    <Point><coordinates>{_text(coordinates)}</coordinates></Point>\n')
+        out.append('  </Placemark>\n')
+        self._fd.write(''.join(out))
+        self.count += 1
+
+    def close(self):
+        if self._fd is None:
+            return
+
+        self._fd.write('</Document>\n</kml>\n')
+        self._fd.close()
+        self._fd = None
+        if self._zip:
+            self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+"""
+Micro-benchmark for trn_elevation queries on a synthetic TDB2 file.
+
+Writes a synthetic trn.dat (see trn_synthetic.py), then measures
+queries/second with the default seek+read handle, the mmap-backed handle
+and the finest-level map. For regression tracking, see
+test_trn_benchmark.py (pytest-benchmark).
+
+Usage:
+    python bench_trn_elevation.py [-n QUERIES] [--empty-ratio R]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from trn_elevation import (
+    DEFAULT_CACHE_SIZE,
+    open_terrain_db,
+    query_elevation,
+    query_elevations,
+)
+from trn_synthetic import write_synthetic_db
+
+
+def bench(path, points, use_mmap, cache_size=0, level_map=False):
+    db = open_terrain_db(path, use_mmap=use_mmap, cache_size=cache_size,
+                         level_map=level_map)
+    try:
+        t0 = time.perf_counter()
+        for lat, lon in points:
+            query_elevation(db, lat, lon)
+        return len(points) / (time.perf_counter() - t0)
+    finally:
+        db.close()
+
+
+def bench_batch(path, points):
+    lats = [lat for lat, _ in points]
+    lons = [lon for _, lon in points]
+    db = open_terrain_db(path, use_mmap=True, cache_size=0)
+    try:
+        t0 = time.perf_counter()
+        query_elevations(db, lats, lons)
+        return len(points) / (time.perf_counter() - t0)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark trn_elevation queries.")
+    parser.add_argument("-n", type=int, default=200000,
+                        help="Number of queries (default: %(default)s)")
+    parser.add_argument("--res", type=float, default=0.703125,
+                        help="Finest tile size in degrees (default: %(default)s)")
+    parser.add_argument("--empty-ratio", type=float, default=0.5,
+                        help="Fraction of empty level-0 tiles (default: %(default)s)")
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".dat")
+    os.close(fd)
+    try:
+        write_synthetic_db(path, args.res, args.empty_ratio)
+        rng = random.Random(1)
+        points = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(args.n)]
+
+        seek = bench(path, points, use_mmap=False)
+        mapped = bench(path, points, use_mmap=True)
+        batch = bench_batch(path, points)
+        bench(path, points[:1], use_mmap=True, level_map=True)  # build sidecar
+        level_map = bench(path, points, use_mmap=True, level_map=True)
+        print(f"File size : {os.path.getsize(path):,} bytes")
+        print(f"seek+read : {seek:,.0f} queries/s")
+        print(f"mmap      : {mapped:,.0f} queries/s ({mapped / seek:.2f}x)")
+        print(f"level map : {level_map:,.0f} queries/s ({level_map / seek:.2f}x)")
+        print(f"batch     : {batch:,.0f} queries/s ({batch / seek:.2f}x)")
+
+        # A flight path crosses the same few tiles over and over
+        track = [(40.0 + i * 2e-4, -120.0 + i * 3e-4) for i in range(args.n)]
+        uncached = bench(path, track, use_mmap=True)
+        cached = bench(path, track, use_mmap=True, cache_size=DEFAULT_CACHE_SIZE)
+        print(f"track     : {uncached:,.0f} queries/s uncached, "
+              f"{cached:,.0f} cached ({cached / uncached:.2f}x)")
+    finally:
+        os.unlink(path)
+        if os.path.exists(path + ".levels"):
+            os.unlink(path + ".levels")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+pytest-benchmark suite for trn_elevation, against synthetic trn.dat files.
+
+    pytest terrain/test_trn_benchmark.py --benchmark-autosave
+    pytest terrain/test_trn_benchmark.py --benchmark-compare --benchmark-compare-fail=mean:20%
+
+Pass --benchmark-skip to leave these out of a normal test run.
+
+Tile caching is off unless a test is about the cache, so every query pays
+for its index and header reads.
+"""
+
+import random
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from trn_elevation import (
+    NUM_LEVELS,
+    open_terrain_db,
+    query_elevation,
+    query_elevations,
+)
+from trn_synthetic import write_synthetic_db
+
+BATCH_SIZE = 10000
+
+
+@pytest.fixture(scope="module")
+def trn_path(tmp_path_factory):
+    """Half of the level 0 tiles empty, like land and sea."""
+    return str(write_synthetic_db(tmp_path_factory.mktemp("trn") / "trn.dat"))
+
+
+@pytest.fixture(scope="module")
+def ocean_path(tmp_path_factory):
+    """Every level but the coarsest empty: the longest possible fallback."""
+    path = tmp_path_factory.mktemp("ocean") / "trn.dat"
+    return str(write_synthetic_db(path, empty_ratio=1.0, empty_decay=1.0))
+
+
+@pytest.fixture(scope="module")
+def points():
+    rng = random.Random(1)
+    return [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(BATCH_SIZE)]
+
+
+@pytest.fixture(params=[False, True], ids=["seek", "mmap"])
+def db(request, trn_path):
+    db = open_terrain_db(trn_path, use_mmap=request.param, cache_size=0)
+    yield db
+    db.close()
+
+
+def _land_point(db):
+    """A point on a populated level 0 tile."""
+    rng = random.Random(2)
+    while True:
+        lat, lon = rng.uniform(-60, 60), rng.uniform(-180, 180)
+        if query_elevation(db, lat, lon)["level"] == 0:
+            return lat, lon
+
+
+def test_single_query(benchmark, db):
+    lat, lon = _land_point(db)
+    result = benchmark(query_elevation, db, lat, lon)
+    assert result["level"] == 0
+
+
+def test_single_query_cached(benchmark, trn_path):
+    db = open_terrain_db(trn_path, use_mmap=True)
+    try:
+        lat, lon = _land_point(db)
+        result = benchmark(query_elevation, db, lat, lon)
+        assert result["level"] == 0
+        assert db.cache_hits > 0
+    finally:
+        db.close()
+
+
+def test_batch_query(benchmark, db, points):
+    lats = [lat for lat, _ in points]
+    lons = [lon for _, lon in points]
+    result = benchmark(query_elevations, db, lats, lons)
+    assert len(result["elevation"]) == BATCH_SIZE
+
+
+def test_cold_open(benchmark, trn_path):
+    def open_query_close():
+        db = open_terrain_db(trn_path, use_mmap=True)
+        try:
+            return query_elevation(db, 46.85, -121.76)
+        finally:
+            db.close()
+
+    assert benchmark(open_query_close) is not None
+
+
+def test_cold_open_level_map(benchmark, trn_path):
+    # The first open builds the sidecar; the benchmark measures loading it
+    open_terrain_db(trn_path, level_map=True).close()
+
+    def open_query_close():
+        db = open_terrain_db(trn_path, use_mmap=True, level_map=True)
+        try:
+            return query_elevation(db, 46.85, -121.76)
+        finally:
+            db.close()
+
+    assert benchmark(open_query_close) is not None
+
+
+@pytest.mark.parametrize("level_map", [False, True], ids=["walk", "level-map"])
+def test_fallback_query(benchmark, ocean_path, tmp_path, level_map):
+    db = open_terrain_db(ocean_path, use_mmap=True, cache_size=0,
+                         level_map=str(tmp_path / "trn.dat.levels") if level_map else False)
+    try:
+        result = benchmark(query_elevation, db, -33.9, 18.4)
+        assert result["level"] == NUM_LEVELS - 1
+    finally:
+        db.close()
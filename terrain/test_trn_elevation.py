@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""Tests for trn_elevation.py, against a synthetic trn.dat."""
+
+import asyncio
+import json
+import math
+import os
+import random
+
+import pytest
+
+from trn_elevation import (
+    EARTH_RADIUS_M,
+    FLAT_INDEX_OFFSET,
+    INDEX_ENTRY_SIZE,
+    LEVEL_MAP_HEADER,
+    METERS_PER_NM,
+    NUM_LEVELS,
+    ElevationServer,
+    build_level_map,
+    open_terrain_db,
+    query_elevation,
+    query_elevations,
+    route_elevation_profile,
+)
+from trn_synthetic import write_synthetic_db
+
+
+@pytest.fixture(scope="module")
+def trn_path(tmp_path_factory):
+    return str(write_synthetic_db(tmp_path_factory.mktemp("trn") / "trn.dat"))
+
+
+@pytest.fixture(scope="module")
+def sparse_path(tmp_path_factory):
+    """Mostly empty tiles, so queries fall back through several levels."""
+    path = tmp_path_factory.mktemp("sparse") / "trn.dat"
+    return str(write_synthetic_db(path, empty_ratio=0.9, empty_decay=1.2, seed=3))
+
+
+@pytest.fixture(scope="module")
+def ocean_path(tmp_path_factory):
+    """Every level but the coarsest empty: each query walks all levels."""
+    path = tmp_path_factory.mktemp("ocean") / "trn.dat"
+    return str(write_synthetic_db(path, empty_ratio=1.0, empty_decay=1.0))
+
+
+def _points(n, seed=0):
+    rng = random.Random(seed)
+    return [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(n)]
+
+
+@pytest.fixture
+def db(trn_path):
+    db = open_terrain_db(trn_path, use_mmap=True)
+    yield db
+    db.close()
+
+
+async def _request(port, method, target, body=b"", close=True):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        headers = f"Content-Length: {len(body)}\r\n"
+        if close:
+            headers += "Connection: close\r\n"
+        writer.write(f"{method} {target} HTTP/1.1\r\n{headers}\r\n".encode() + body)
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        length = 0
+        while (line := await reader.readline()) != b"\r\n":
+            name, _, value = line.decode().partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await reader.readexactly(length))
+    finally:
+        writer.close()
+
+
+def _serve(db, requests):
+    """Run an ElevationServer on a free port and send (method, target, body)s."""
+    srv = ElevationServer(db)
+
+    async def run():
+        server = await srv.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return [await _request(port, *r) for r in requests]
+
+    return srv, asyncio.run(run())
+
+
+class TestServer:
+    def test_single(self, db):
+        _, [(status, result)] = _serve(db, [("GET", "/elevation?lat=46.85&lon=-121.76")])
+        assert status == 200
+        assert result == json.loads(json.dumps(query_elevation(db, 46.85, -121.76)))
+
+    def test_batch(self, db):
+        points = [[46.85, -121.76], [-33.9, 18.4], [0.0, 0.0], [89.9, 179.9]]
+        body = json.dumps({"points": points}).encode()
+        _, [(status, result)] = _serve(db, [("POST", "/elevation", body)])
+        assert status == 200
+        assert result["count"] == len(points)
+
+        expected = query_elevations(db, [p[0] for p in points], [p[1] for p in points])
+        for name, column in expected.items():
+            for got, want in zip(result[name], column):
+                if isinstance(want, float) and math.isnan(want):
+                    assert got is None
+                else:
+                    assert got == want
+
+    def test_errors(self, db):
+        srv, responses = _serve(db, [
+            ("GET", "/elevation?lat=abc&lon=0"),
+            ("GET", "/elevation?lat=95&lon=0"),
+            ("POST", "/elevation", b"{not json"),
+            ("GET", "/nowhere"),
+            ("DELETE", "/elevation"),
+        ])
+        assert [status for status, _ in responses] == [400, 400, 400, 404, 405]
+        assert all("error" in result for _, result in responses)
+        assert srv.errors == 5
+
+    def test_infinite_level(self, db):
+        srv, responses = _serve(db, [
+            ("POST", "/elevation", b'{"points": [[1, 2]], "level": 1e400}'),
+            ("POST", "/elevation", b'{"points": [[1, 2]], "level": Infinity}'),
+        ])
+        assert [status for status, _ in responses] == [400, 400]
+        assert all("OverflowError" in result["error"] for _, result in responses)
+        assert srv.errors == 2
+
+    def test_internal_error(self, db, monkeypatch):
+        def broken(self, method, target, body=b""):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(ElevationServer, "handle", broken)
+        srv, [(status, result)] = _serve(db, [("GET", "/elevation?lat=1&lon=2")])
+        assert status == 500
+        assert result == {"error": "RuntimeError: boom"}
+        assert srv.errors == 1
+
+    def test_stats(self, db):
+        srv, responses = _serve(db, [("GET", "/elevation?lat=10&lon=10")] * 20
+                                + [("GET", "/stats")])
+        status, stats = responses[-1]
+        assert status == 200
+        assert stats["requests"] == 20
+        assert stats["points"] == 20
+        latency = stats["latency_ms"]
+        assert latency["count"] == 20
+        assert 0 <= latency["p50"] <= latency["p90"] <= latency["p99"] <= latency["max"]
+        assert stats["cache"]["hits"] + stats["cache"]["misses"] > 0
+
+    def test_keep_alive(self, db):
+        srv = ElevationServer(db)
+
+        async def run():
+            server = await srv.start("127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                for _ in range(3):
+                    writer.write(b"GET /elevation?lat=1&lon=2 HTTP/1.1\r\n\r\n")
+                    await writer.drain()
+                    assert (await reader.readline()).startswith(b"HTTP/1.1 200")
+                    length = 0
+                    while (line := await reader.readline()) != b"\r\n":
+                        if line.lower().startswith(b"content-length:"):
+                            length = int(line.split(b":")[1])
+                    await reader.readexactly(length)
+                writer.close()
+
+        asyncio.run(run())
+        assert srv.requests == 3
+
+
+class TestLevelMap:
+    def test_matches_level_walk(self, sparse_path, tmp_path):
+        walk = open_terrain_db(sparse_path, cache_size=0)
+        mapped = open_terrain_db(sparse_path, cache_size=0,
+                                 level_map=str(tmp_path / "trn.dat.levels"))
+        try:
+            levels = set()
+            for lat, lon in _points(3000) + [(90, 180), (-90, -180), (0, 0)]:
+                expected = query_elevation(walk, lat, lon)
+                assert query_elevation(mapped, lat, lon) == expected
+                levels.add(expected["level"])
+            assert len(levels) >= 3  # the fallback is exercised
+        finally:
+            walk.close()
+            mapped.close()
+
+    def test_sidecar_written_and_reused(self, tmp_path):
+        path = str(write_synthetic_db(tmp_path / "trn.dat", empty_ratio=0.9))
+        open_terrain_db(path, level_map=True).close()
+        sidecar = path + ".levels"
+        assert os.path.exists(sidecar)
+
+        # A valid sidecar is read back as is, not rebuilt
+        with open(sidecar, "r+b") as f:
+            f.seek(LEVEL_MAP_HEADER.size)
+            first = f.read(1)
+            f.seek(LEVEL_MAP_HEADER.size)
+            f.write(bytes([first[0] ^ 1]))
+        db = open_terrain_db(path, level_map=True)
+        try:
+            assert db.level_map[0] == first[0] ^ 1
+        finally:
+            db.close()
+
+    @pytest.mark.parametrize("change", ["size", "mtime"])
+    def test_sidecar_rebuilt_when_stale(self, tmp_path, change):
+        path = str(write_synthetic_db(tmp_path / "trn.dat", empty_ratio=0.9, seed=1))
+        open_terrain_db(path, level_map=True).close()
+        st = os.stat(path)
+
+        if change == "size":
+            write_synthetic_db(path, empty_ratio=0.5, seed=2)
+            assert os.stat(path).st_size != st.st_size
+        else:
+            # Same size, different content: empty every level 0 tile in place,
+            # so only the mtime tells
+            db = open_terrain_db(path)
+            _, lat_tiles, lon_tiles = db.levels[0]
+            db.close()
+            with open(path, "r+b") as f:
+                f.seek(FLAT_INDEX_OFFSET)
+                f.write(bytes(lat_tiles * lon_tiles * INDEX_ENTRY_SIZE))
+            assert os.stat(path).st_size == st.st_size
+            os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+        db = open_terrain_db(path, level_map=True)
+        try:
+            with open(path + ".levels", "rb") as f:
+                data = f.read()
+            _, size, mtime_ns, _, _ = LEVEL_MAP_HEADER.unpack_from(data)
+            new = os.stat(path)
+            assert (size, mtime_ns) == (new.st_size, new.st_mtime_ns)
+            assert data[LEVEL_MAP_HEADER.size:] == db.level_map == build_level_map(db)
+            if change == "mtime":
+                assert 0 not in db.level_map
+        finally:
+            db.close()
+
+    def test_unwritable_sidecar(self, sparse_path, tmp_path):
+        # The sidecar's directory is a file, so it can be neither read nor
+        # written, whatever the permissions of the test user
+        blocker = tmp_path / "blocker"
+        blocker.write_text("")
+        sidecar = str(blocker / "trn.dat.levels")
+        walk = open_terrain_db(sparse_path, cache_size=0)
+        db = open_terrain_db(sparse_path, level_map=sidecar)
+        try:
+            assert db.level_map is not None
+            for lat, lon in _points(200, seed=1):
+                assert query_elevation(db, lat, lon) == query_elevation(walk, lat, lon)
+        finally:
+            db.close()
+            walk.close()
+        assert not os.path.exists(sidecar + ".tmp")
+
+
+class TestTileCache:
+    def test_tiny_cache_matches_uncached(self, sparse_path):
+        uncached = open_terrain_db(sparse_path, cache_size=0)
+        tiny = open_terrain_db(sparse_path, use_mmap=True, cache_size=2)
+        try:
+            # Each point twice in a row, so the walks mix hits, misses and
+            # evictions
+            for lat, lon in [p for p in _points(500, seed=2) for _ in range(2)]:
+                assert query_elevation(tiny, lat, lon) == query_elevation(uncached, lat, lon)
+            stats = tiny.cache_stats()
+            assert stats["size"] == 2
+            assert stats["hits"] > 0 and stats["evictions"] > 0
+            assert uncached.cache_stats()["hits"] == uncached.cache_stats()["misses"] == 0
+        finally:
+            uncached.close()
+            tiny.close()
+
+    def test_lru_counters(self, trn_path):
+        db = open_terrain_db(trn_path, cache_size=0)
+        rng = random.Random(4)
+        tiles = {}
+        while len(tiles) < 3:
+            lat, lon = rng.uniform(-80, 80), rng.uniform(-180, 180)
+            result = query_elevation(db, lat, lon)
+            if result["level"] == 0:
+                tiles.setdefault((result["tile_lat_south"], result["tile_lon_west"]), (lat, lon))
+        db.close()
+        a, b, c = tiles.values()
+
+        db = open_terrain_db(trn_path, cache_size=2)
+        try:
+            # miss, miss, hit, miss evicting b, miss evicting a
+            for lat, lon in (a, b, a, c, b):
+                query_elevation(db, lat, lon)
+            assert db.cache_stats() == {"size": 2, "capacity": 2, "hits": 1, "misses": 4,
+                                        "evictions": 2, "hit_rate": 0.2}
+        finally:
+            db.close()
+
+    def test_fallback_counters(self, ocean_path):
+        db = open_terrain_db(ocean_path, cache_size=NUM_LEVELS)
+        try:
+            first = query_elevation(db, -33.9, 18.4)
+            assert first["level"] == NUM_LEVELS - 1
+            assert query_elevation(db, -33.9, 18.4) == first
+            stats = db.cache_stats()
+            assert (stats["misses"], stats["hits"], stats["evictions"]) == (NUM_LEVELS, NUM_LEVELS, 0)
+        finally:
+            db.close()
+
+        # Two slots for a walk over every level: the LRU order evicts each
+        # level before the next walk comes back to it
+        db = open_terrain_db(ocean_path, cache_size=2)
+        try:
+            assert query_elevation(db, -33.9, 18.4) == first
+            assert query_elevation(db, -33.9, 18.4) == first
+            stats = db.cache_stats()
+            assert (stats["misses"], stats["hits"], stats["evictions"]) == (
+                2 * NUM_LEVELS, 0, 2 * NUM_LEVELS - 2)
+        finally:
+            db.close()
+
+
+# Points on tile edges, the poles and the antimeridian
+EDGE_POINTS = [(90, 180), (-90, -180), (90, -180), (-90, 180), (0, 0),
+               (45, 90), (-45, -90), (0.703125, -179.296875)]
+
+
+@pytest.fixture
+def void_path(tmp_path):
+    """No data at any level: every query is out of coverage."""
+    path = str(write_synthetic_db(tmp_path / "trn.dat"))
+    db = open_terrain_db(path)
+    db.close()
+    with open(path, "r+b") as f:
+        f.seek(FLAT_INDEX_OFFSET)
+        f.write(bytes(db.total_entries * INDEX_ENTRY_SIZE))
+    return path
+
+
+class TestMmap:
+    def test_mmap_matches_seek(self, sparse_path):
+        seek = open_terrain_db(sparse_path, cache_size=0)
+        mm = open_terrain_db(sparse_path, use_mmap=True, cache_size=0)
+        try:
+            points = _points(1000, seed=5) + EDGE_POINTS
+            for lat, lon in points:
+                for level in (0, 3):
+                    assert (query_elevation(mm, lat, lon, level)
+                            == query_elevation(seek, lat, lon, level))
+            lats, lons = zip(*points)
+            assert query_elevations(mm, lats, lons) == query_elevations(seek, lats, lons)
+        finally:
+            seek.close()
+            mm.close()
+
+
+class TestBatchQuery:
+    @pytest.mark.parametrize("level_map", [False, True], ids=["walk", "level-map"])
+    @pytest.mark.parametrize("level", [0, 2])
+    def test_batch_matches_single(self, sparse_path, tmp_path, level, level_map):
+        db = open_terrain_db(sparse_path, cache_size=0,
+                             level_map=str(tmp_path / "levels") if level_map else False)
+        try:
+            points = _points(2000, seed=6) + EDGE_POINTS
+            lats, lons = zip(*points)
+            columns = query_elevations(db, lats, lons, level)
+            for i, (lat, lon) in enumerate(points):
+                expected = query_elevation(db, lat, lon, level)
+                assert columns["level"][i] == expected["level"]
+                for name in ("elevation", "min_elevation", "max_elevation", "uncertainty"):
+                    assert columns[name][i] == expected[name]
+            assert len(set(columns["level"])) >= 3  # the fallback is exercised
+        finally:
+            db.close()
+
+    def test_out_of_coverage(self, void_path):
+        db = open_terrain_db(void_path, use_mmap=True)
+        try:
+            points = _points(50, seed=7) + EDGE_POINTS
+            lats, lons = zip(*points)
+            columns = query_elevations(db, lats, lons)
+            for i, (lat, lon) in enumerate(points):
+                assert query_elevation(db, lat, lon) is None
+                assert columns["level"][i] == -1
+                assert math.isnan(columns["elevation"][i])
+        finally:
+            db.close()
+
+    def test_batch_errors(self, db):
+        with pytest.raises(ValueError):
+            query_elevations(db, [0.0, 1.0], [0.0])
+        with pytest.raises(ValueError):
+            query_elevations(db, [91.0], [0.0])
+        with pytest.raises(ValueError):
+            query_elevations(db, [0.0], [0.0], NUM_LEVELS)
+
+
+def _destination(lat, lon, bearing, delta):
+    """Point at angular distance delta (radians) from lat/lon along bearing."""
+    phi1, lam1 = math.radians(lat), math.radians(lon)
+    phi2 = math.asin(math.sin(phi1) * math.cos(delta)
+                     + math.cos(phi1) * math.sin(delta) * math.cos(bearing))
+    lam2 = lam1 + math.atan2(math.sin(bearing) * math.sin(delta) * math.cos(phi1),
+                             math.cos(delta) - math.sin(phi1) * math.sin(phi2))
+    return math.degrees(phi2), (math.degrees(lam2) + 540) % 360 - 180
+
+
+def _brute_force_leg(db, lat1, lon1, lat2, lon2, spacing):
+    """(distance_nm, max_elevation, level) sampling the leg point by point."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dlam = math.radians(lon2 - lon1)
+    delta = math.acos(max(-1.0, min(1.0, math.sin(phi1) * math.sin(phi2)
+                                    + math.cos(phi1) * math.cos(phi2) * math.cos(dlam))))
+    bearing = math.atan2(math.sin(dlam) * math.cos(phi2),
+                         math.cos(phi1) * math.sin(phi2)
+                         - math.sin(phi1) * math.cos(phi2) * math.cos(dlam))
+    distance = delta * EARTH_RADIUS_M
+    n = max(1, math.ceil(distance / spacing))
+    samples = [_destination(lat1, lon1, bearing, delta * i / n) for i in range(n)]
+    samples.append((lat2, lon2))
+
+    best = None
+    for lat, lon in samples:
+        result = query_elevation(db, lat, lon)
+        if result and (best is None or result["max_elevation"] > best[0]):
+            best = (result["max_elevation"], result["level"])
+    return distance / METERS_PER_NM, best
+
+
+class TestRouteProfile:
+    SPACING = 5000.0
+
+    def _check(self, db, waypoints):
+        profile = route_elevation_profile(db, waypoints, self.SPACING)
+        total = 0.0
+        for seg, (a, b) in zip(profile["segments"], zip(waypoints, waypoints[1:])):
+            distance_nm, best = _brute_force_leg(db, *a, *b, self.SPACING)
+            total += distance_nm
+            assert seg["distance_nm"] == pytest.approx(distance_nm, abs=0.01)
+            assert (seg["max_elevation"], seg["level"]) == best
+            # The endpoints are sampled too
+            for lat, lon in (a, b):
+                assert seg["max_elevation"] >= query_elevation(db, lat, lon)["max_elevation"]
+        assert profile["distance_nm"] == pytest.approx(total, abs=0.01)
+        assert profile["max_elevation"] == max(s["max_elevation"] for s in profile["segments"])
+        return profile
+
+    def test_matches_brute_force(self, sparse_path):
+        db = open_terrain_db(sparse_path, use_mmap=True)
+        try:
+            rng = random.Random(8)
+            for _ in range(5):
+                lat, lon = rng.uniform(-60, 60), rng.uniform(-170, 170)
+                waypoints = [(lat, lon)]
+                for _ in range(3):
+                    lat = max(-89.0, min(89.0, lat + rng.uniform(-4, 4)))
+                    lon = max(-180.0, min(180.0, lon + rng.uniform(-4, 4)))
+                    waypoints.append((lat, lon))
+                self._check(db, waypoints)
+        finally:
+            db.close()
+
+    def test_level_map(self, sparse_path, tmp_path):
+        waypoints = [(46.85, -121.76), (47.5, -118.0), (45.0, -115.0)]
+        walk = open_terrain_db(sparse_path)
+        mapped = open_terrain_db(sparse_path, level_map=str(tmp_path / "levels"))
+        try:
+            assert (route_elevation_profile(mapped, waypoints, self.SPACING)
+                    == route_elevation_profile(walk, waypoints, self.SPACING))
+        finally:
+            walk.close()
+            mapped.close()
+
+    def test_antimeridian(self, sparse_path):
+        db = open_terrain_db(sparse_path)
+        try:
+            profile = self._check(db, [(10.0, 179.0), (12.0, -179.0), (11.0, 178.5)])
+            # Across the antimeridian, not around the world
+            assert profile["segments"][0]["distance_nm"] < 200
+        finally:
+            db.close()
+
+    def test_same_point(self, sparse_path):
+        db = open_terrain_db(sparse_path)
+        try:
+            profile = route_elevation_profile(db, [(46.85, -121.76), (46.85, -121.76)])
+            expected = query_elevation(db, 46.85, -121.76)
+            assert profile["distance_nm"] == 0
+            assert profile["max_elevation"] == expected["max_elevation"]
+            assert profile["level"] == expected["level"]
+            assert profile["tiles"] == 1
+        finally:
+            db.close()
+
+    def test_errors(self, db):
+        with pytest.raises(ValueError):
+            route_elevation_profile(db, [(0.0, 0.0)])
+        with pytest.raises(ValueError):
+            route_elevation_profile(db, [(0.0, 0.0), (1.0, 1.0)], spacing=0)
+        with pytest.raises(ValueError):
+            route_elevation_profile(db, [(0.0, 0.0), (0.0, 181.0)])
@@ -17,13 +17,33 @@ Usage:
     #  'min_elevation': 855, 'max_elevation': 4392, 'unit': 'meters', ...}
     db.close()
 
+    # Memory-mapped handle: queries are pure in-memory work
+    db = open_terrain_db("trn.dat", use_mmap=True)
+
+    # With a finest-level map (cached in trn.dat.levels), every query is a
+    # single index lookup, even over oceans
+    db = open_terrain_db("trn.dat", use_mmap=True, level_map=True)
+
     # Or as a one-shot:
     result = get_elevation("trn.dat", lat=46.8523, lon=-121.7603)
+
+    # Or as a local HTTP service keeping one mmap'd handle open:
+    #   python trn_elevation.py trn.dat --serve 8080
+    #   curl 'localhost:8080/elevation?lat=46.8523&lon=-121.7603'
+    #   curl -d '{"points": [[46.85, -121.76], [27.99, 86.93]]}' localhost:8080/elevation
+    #   curl localhost:8080/stats
 """
 
+import json
+import mmap
+import os
 import struct
 import math
-from typing import Optional
+import time
+from array import array
+from collections import OrderedDict, deque
+from urllib.parse import parse_qs, urlsplit
+from typing import Optional, Sequence, Tuple, Union
 
 # File layout constants
 HEADER_SIZE = 7
@@ -45,12 +65,37 @@ FLAT_INDEX_OFFSET = ROOT_POINTER_OFFSET + ROOT_POINTER_SIZE
 # Semicircle conversion
 SEMICIRCLE_TO_DEG = 180.0 / (2 ** 31)
 
+# Mean Earth radius, for great-circle routes
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_NM = 1852.0
+
+# Index entry: offset (u32), size (u24 as u16 + u8), 2 unknown bytes, flags (u16)
+INDEX_ENTRY = struct.Struct("<IHB2xH")
+
+# Tile header: 11 unknown bytes, max elev (s16), min elev (s16), data size (u16)
+TILE_HEADER = struct.Struct("<11xhhH")
+
+# Decoded tiles kept per handle by default (each entry is two small tuples)
+DEFAULT_CACHE_SIZE = 4096
+
+# Finest-level map sidecar: magic, trn.dat size (u64) and mtime_ns (s64),
+# level 0 lat/lon tiles (u32 each), then one byte per level 0 cell
+LEVEL_MAP_HEADER = struct.Struct("<8sQqII")
+LEVEL_MAP_MAGIC = b"TRNLVL1\x00"
+NO_DATA_LEVEL = 255
+
 
 class TerrainDB:
     """Handle to an open Garmin trn.dat terrain database."""
 
-    def __init__(self, f, levels, total_entries):
+    def __init__(self, f, levels, total_entries, mm=None,
+                 cache_size=DEFAULT_CACHE_SIZE):
         self.f = f
+        self.path = getattr(f, "name", None)
+        # With use_mmap, the whole file is mapped and read zero-copy through
+        # a memoryview; otherwise every read is a seek + read on self.f.
+        self.mm = mm
+        self.buf = memoryview(mm) if mm is not None else None
         self.levels = levels  # list of (resolution_semicircles, lat_tiles, lon_tiles)
         self.total_entries = total_entries
         # Precompute the starting entry index for each level.
@@ -60,13 +105,54 @@ class TerrainDB:
         for _, lat_t, lon_t in self.levels:
             self._level_offsets.append(offset)
             offset += lat_t * lon_t
+        # LRU cache of decoded (index entry, tile header) keyed by
+        # (level, lat_idx, lon_idx). cache_size=0 disables it.
+        self.cache_size = cache_size
+        self._tile_cache = OrderedDict() if cache_size > 0 else None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_evictions = 0
+        # Finest level with data for each level 0 cell, row-major, or None
+        # to walk the levels on every query. See load_level_map().
+        self.level_map = None
+
+    def cache_stats(self) -> dict:
+        """Return tile cache counters and the current hit rate."""
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "size": len(self._tile_cache) if self._tile_cache is not None else 0,
+            "capacity": self.cache_size,
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "evictions": self.cache_evictions,
+            "hit_rate": self.cache_hits / lookups if lookups else 0.0,
+        }
 
     def close(self):
+        if self.buf is not None:
+            self.buf.release()
+            self.mm.close()
         self.f.close()
 
 
-def open_terrain_db(path: str) -> TerrainDB:
-    """Open a trn.dat file and parse its level table."""
+def open_terrain_db(
+    path: str,
+    use_mmap: bool = False,
+    cache_size: int = DEFAULT_CACHE_SIZE,
+    level_map: Union[bool, str] = False,
+) -> TerrainDB:
+    """Open a trn.dat file and parse its level table.
+
+    With use_mmap=True the file is memory-mapped, so queries never issue
+    seek/read syscalls and the OS page cache is used directly.
+
+    cache_size is the number of decoded tiles (index entry + header) kept in
+    the handle's LRU cache; 0 disables caching.
+
+    level_map=True loads the finest-level map from path + ".levels",
+    building it first if it is missing or stale; a string gives the sidecar
+    path instead.
+    """
     f = open(path, "rb")
 
     # Read level table
@@ -84,31 +170,211 @@ def open_terrain_db(path: str) -> TerrainDB:
     # (sum of lat_tiles * lon_tiles for all levels)
     total = sum(lt * lo for _, lt, lo in levels)
 
-    return TerrainDB(f, levels, total)
+    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if use_mmap else None
+
+    db = TerrainDB(f, levels, total, mm, cache_size)
+    if level_map:
+        load_level_map(db, None if level_map is True else level_map)
+    return db
+
+
+# Byte translation tables for decoding a whole level of index entries at once
+_IS_ZERO = bytes([1] + [0] * 255)
+_IS_NONZERO = bytes([0] + [1] * 255)
+_IS_TWO = bytes([0, 0, 1] + [0] * 253)
+_AT_LEAST_HEADER = bytes([0] * TILE_HEADER_SIZE + [1] * (256 - TILE_HEADER_SIZE))
+_ONE_TO_FF = bytes([0] + [255] * 255)
+
+
+def _has_data(db: TerrainDB, level: int) -> bytes:
+    """
+    Return one byte per tile of a level: 1 where the tile has data (the same
+    test as the queries: flags == 2 and size >= TILE_HEADER_SIZE), else 0.
+    """
+    _, lat_tiles, lon_tiles = db.levels[level]
+    n = lat_tiles * lon_tiles
+    pos = FLAT_INDEX_OFFSET + db._level_offsets[level] * INDEX_ENTRY_SIZE
+    length = n * INDEX_ENTRY_SIZE
+    if db.buf is not None:
+        raw = bytes(db.buf[pos:pos + length])
+    else:
+        db.f.seek(pos)
+        raw = db.f.read(length)
+    # Entries past the end of a truncated file read as empty
+    raw += bytes(length - len(raw))
+
+    # Byte columns of the entry (see INDEX_ENTRY), combined as big integers
+    def column(i, table):
+        return int.from_bytes(raw[i::INDEX_ENTRY_SIZE].translate(table), "little")
+
+    size_ok = (column(4, _AT_LEAST_HEADER) | column(5, _IS_NONZERO)
+               | column(6, _IS_NONZERO))
+    has = column(9, _IS_TWO) & column(10, _IS_ZERO) & size_ok
+    return has.to_bytes(n, "little")
+
+
+def build_level_map(db: TerrainDB) -> bytes:
+    """
+    Return the finest level with data for every level 0 cell, one byte per
+    cell in row-major order, NO_DATA_LEVEL where no level has data.
+
+    Works from the coarsest level down: a cell's value is its own level if
+    it has data, else the value of the coarser tile containing its center.
+    """
+    best = None
+    for level in range(NUM_LEVELS - 1, -1, -1):
+        resolution, lat_tiles, lon_tiles = db.levels[level]
+        n = lat_tiles * lon_tiles
+        if best is None:
+            parent = bytes([NO_DATA_LEVEL]) * n
+        else:
+            # Coarser tile containing each cell center, in integer semicircles
+            p_res, p_lat_tiles, p_lon_tiles = db.levels[level + 1]
+            col_map = [min((2 * j + 1) * resolution // (2 * p_res), p_lon_tiles - 1)
+                       for j in range(lon_tiles)]
+            rows = {}
+            out = []
+            for i in range(lat_tiles):
+                p_row = min((2 * i + 1) * resolution // (2 * p_res), p_lat_tiles - 1)
+                if p_row not in rows:
+                    row = best[p_row * p_lon_tiles:(p_row + 1) * p_lon_tiles]
+                    rows[p_row] = bytes(map(row.__getitem__, col_map))
+                out.append(rows[p_row])
+            parent = b"".join(out)
+
+        # best = level where the tile has data, parent elsewhere
+        mask = int.from_bytes(_has_data(db, level).translate(_ONE_TO_FF), "little")
+        own = int.from_bytes(bytes([level]) * n, "little")
+        other = int.from_bytes(parent, "little")
+        best = ((own & mask) | (other & ~mask)).to_bytes(n, "little")
+    return best
+
+
+def load_level_map(db: TerrainDB, path: Optional[str] = None) -> bytes:
+    """
+    Attach the finest-level map to db, reading it from the sidecar file
+    (default: trn.dat path + ".levels") when it matches the current size
+    and mtime of trn.dat, and rebuilding and rewriting it otherwise. The
+    map is still used if the sidecar cannot be written.
+    """
+    if path is None:
+        path = db.path + ".levels"
+    st = os.stat(db.f.fileno())
+    _, lat_tiles, lon_tiles = db.levels[0]
+    header = LEVEL_MAP_HEADER.pack(LEVEL_MAP_MAGIC, st.st_size, st.st_mtime_ns,
+                                   lat_tiles, lon_tiles)
+    n = lat_tiles * lon_tiles
+
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        if data[:LEVEL_MAP_HEADER.size] == header and len(data) == len(header) + n:
+            db.level_map = data[len(header):]
+            return db.level_map
+    except OSError:
+        pass
+
+    db.level_map = build_level_map(db)
+    # Another process opening the same trn.dat may be reading the sidecar
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(header)
+            f.write(db.level_map)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+    return db.level_map
+
+
+def _finest_level(db: TerrainDB, lat_idx: int, lon_idx: int) -> int:
+    """Level to start at for a level 0 cell: 0 without a level map."""
+    if db.level_map is None:
+        return 0
+    return db.level_map[lat_idx * db.levels[0][2] + lon_idx]
 
 
 def _read_index_entry(db: TerrainDB, entry_index: int):
     """Read a single tile index entry. Returns (offset, size, flags)."""
-    db.f.seek(FLAT_INDEX_OFFSET + entry_index * INDEX_ENTRY_SIZE)
+    pos = FLAT_INDEX_OFFSET + entry_index * INDEX_ENTRY_SIZE
+    if db.buf is not None:
+        if pos + INDEX_ENTRY_SIZE > len(db.buf):
+            return None, 0, 0
+        file_offset, size_lo, size_hi, flags = INDEX_ENTRY.unpack_from(db.buf, pos)
+        return file_offset, size_lo | (size_hi << 16), flags
+
+    db.f.seek(pos)
     rec = db.f.read(INDEX_ENTRY_SIZE)
     if len(rec) < INDEX_ENTRY_SIZE:
         return None, 0, 0
-    file_offset = struct.unpack_from("<I", rec, 0)[0]
-    size = rec[4] | (rec[5] << 8) | (rec[6] << 16)
-    flags = struct.unpack_from("<H", rec, 9)[0]
-    return file_offset, size, flags
+    file_offset, size_lo, size_hi, flags = INDEX_ENTRY.unpack(rec)
+    return file_offset, size_lo | (size_hi << 16), flags
 
 
 def _read_tile_header(db: TerrainDB, file_offset: int):
     """Read the 17-byte tile header. Returns (max_elev, min_elev, data_size)."""
+    if db.buf is not None:
+        if file_offset + TILE_HEADER_SIZE > len(db.buf):
+            return None, None, 0
+        return TILE_HEADER.unpack_from(db.buf, file_offset)
+
     db.f.seek(file_offset)
     hdr = db.f.read(TILE_HEADER_SIZE)
     if len(hdr) < TILE_HEADER_SIZE:
         return None, None, 0
-    max_elev = struct.unpack_from("<h", hdr, 11)[0]
-    min_elev = struct.unpack_from("<h", hdr, 13)[0]
-    data_size = struct.unpack_from("<H", hdr, 15)[0]
-    return max_elev, min_elev, data_size
+    return TILE_HEADER.unpack(hdr)
+
+
+def _read_tile(db: TerrainDB, level: int, lat_idx: int, lon_idx: int):
+    """
+    Read a tile's index entry and header through the handle's LRU cache.
+
+    Returns ((offset, size, flags), (max_elev, min_elev, data_size)). Empty
+    tiles are cached too, with a header of (None, None, 0), so the coarser
+    level fallback is served from the cache as well.
+    """
+    cache = db._tile_cache
+    key = (level, lat_idx, lon_idx)
+    if cache is not None:
+        tile = cache.get(key)
+        if tile is not None:
+            cache.move_to_end(key)
+            db.cache_hits += 1
+            return tile
+        db.cache_misses += 1
+
+    entry = _read_index_entry(db, _entry_index(db, level, lat_idx, lon_idx))
+    file_offset, size, flags = entry
+    if flags != 2 or size < TILE_HEADER_SIZE:
+        header = (None, None, 0)
+    else:
+        header = _read_tile_header(db, file_offset)
+    tile = (entry, header)
+
+    if cache is not None:
+        cache[key] = tile
+        if len(cache) > db.cache_size:
+            cache.popitem(last=False)
+            db.cache_evictions += 1
+    return tile
+
+
+def _tile_index(db: TerrainDB, level: int, lat: float, lon: float):
+    """Return the (lat_idx, lon_idx) of the tile containing lat/lon."""
+    resolution, lat_tiles, lon_tiles = db.levels[level]
+    res_deg = resolution * SEMICIRCLE_TO_DEG
+
+    # Tile indices (row-major, south to north, west to east)
+    lat_idx = int((lat + 90.0) / res_deg)
+    lon_idx = int((lon + 180.0) / res_deg)
+
+    # Clamp to valid range
+    return min(lat_idx, lat_tiles - 1), min(lon_idx, lon_tiles - 1)
+
+
+def _entry_index(db: TerrainDB, level: int, lat_idx: int, lon_idx: int) -> int:
+    """Return the position of a tile in the flat tile array."""
+    return db._level_offsets[level] + lat_idx * db.levels[level][2] + lon_idx
 
 
 def query_elevation(
@@ -151,21 +417,18 @@ def query_elevation(
     if not (-180 <= lon <= 180):
         raise ValueError(f"lon must be -180 to 180, got {lon}")
 
-    resolution, lat_tiles, lon_tiles = db.levels[level]
-    res_deg = resolution * SEMICIRCLE_TO_DEG
-
-    # Tile indices (row-major, south to north, west to east)
-    lat_idx = int((lat + 90.0) / res_deg)
-    lon_idx = int((lon + 180.0) / res_deg)
-
-    # Clamp to valid range
-    lat_idx = min(lat_idx, lat_tiles - 1)
-    lon_idx = min(lon_idx, lon_tiles - 1)
+    res_deg = db.levels[level][0] * SEMICIRCLE_TO_DEG
+    lat_idx, lon_idx = _tile_index(db, level, lat, lon)
 
-    # Entry index in the flat tile array
-    entry_index = db._level_offsets[level] + lat_idx * lon_tiles + lon_idx
+    if level == 0 and db.level_map is not None:
+        # Jump straight to the finest level that has data
+        finest = _finest_level(db, lat_idx, lon_idx)
+        if finest == NO_DATA_LEVEL:
+            return None
+        if finest:
+            return query_elevation(db, lat, lon, finest)
 
-    file_offset, size, flags = _read_index_entry(db, entry_index)
+    (file_offset, size, flags), header = _read_tile(db, level, lat_idx, lon_idx)
 
     if flags != 2 or size < TILE_HEADER_SIZE:
         # Empty tile (ocean or void). Try coarser levels.
@@ -173,7 +436,7 @@ def query_elevation(
             return query_elevation(db, lat, lon, level + 1)
         return None
 
-    max_elev, min_elev, data_size = _read_tile_header(db, file_offset)
+    max_elev, min_elev, data_size = header
     if max_elev is None:
         return None
 
@@ -203,6 +466,239 @@ def query_elevation(
     }
 
 
+def query_elevations(
+    db: TerrainDB,
+    lats: Sequence[float],
+    lons: Sequence[float],
+    level: int = 0,
+) -> dict:
+    """
+    Query terrain elevation for many points at once (tracks, point clouds).
+
+    Points are grouped by tile so each index entry and tile header is read
+    once per tile rather than once per point. Points that land on an empty
+    tile are regrouped and retried one level coarser, iteratively, exactly
+    like the fallback in query_elevation(). With a level map, points start
+    at their finest level with data instead.
+
+    Args:
+        db: An open TerrainDB handle.
+        lats: Latitudes in degrees (-90 to +90).
+        lons: Longitudes in degrees (-180 to +180), same length as lats.
+        level: Starting zoom level (default 0, finest).
+
+    Returns:
+        A dict of columns, each an array.array with one value per point:
+            elevation, min_elevation, max_elevation, uncertainty: float
+                arrays in meters, rounded like query_elevation(); NaN where
+                there is no data.
+            level: signed byte array with the zoom level used, -1 where
+                there is no data.
+    """
+    if not (0 <= level < NUM_LEVELS):
+        raise ValueError(f"level must be 0-{NUM_LEVELS-1}, got {level}")
+    if len(lats) != len(lons):
+        raise ValueError(f"lats and lons differ in length: {len(lats)} != {len(lons)}")
+    for lat, lon in zip(lats, lons):
+        if not (-90 <= lat <= 90):
+            raise ValueError(f"lat must be -90 to 90, got {lat}")
+        if not (-180 <= lon <= 180):
+            raise ValueError(f"lon must be -180 to 180, got {lon}")
+
+    n = len(lats)
+    nan = float("nan")
+    elevation = array("d", [nan]) * n
+    min_elevation = array("d", [nan]) * n
+    max_elevation = array("d", [nan]) * n
+    uncertainty = array("d", [nan]) * n
+    levels = array("b", [-1]) * n
+
+    # Points to try at each level
+    if level == 0 and db.level_map is not None:
+        start = {}
+        for i in range(n):
+            finest = _finest_level(db, *_tile_index(db, 0, lats[i], lons[i]))
+            if finest != NO_DATA_LEVEL:
+                start.setdefault(finest, []).append(i)
+    else:
+        start = {level: range(n)}
+
+    pending = []
+    while (pending or start) and level < NUM_LEVELS:
+        pending.extend(start.pop(level, ()))
+        tiles = {}
+        for i in pending:
+            key = _tile_index(db, level, lats[i], lons[i])
+            tiles.setdefault(key, []).append(i)
+
+        pending = []
+        for (lat_idx, lon_idx), points in tiles.items():
+            (file_offset, size, flags), header = _read_tile(db, level, lat_idx, lon_idx)
+            if flags != 2 or size < TILE_HEADER_SIZE:
+                # Empty tile: retry these points one level coarser
+                pending.extend(points)
+                continue
+
+            max_elev, min_elev, _ = header
+            if max_elev is None:
+                continue
+
+            mid = round((max_elev + min_elev) / 2.0)
+            unc = round((max_elev - min_elev) / 2.0)
+            for i in points:
+                elevation[i] = mid
+                min_elevation[i] = min_elev
+                max_elevation[i] = max_elev
+                uncertainty[i] = unc
+                levels[i] = level
+
+        level += 1
+
+    return {
+        "elevation": elevation,
+        "min_elevation": min_elevation,
+        "max_elevation": max_elevation,
+        "uncertainty": uncertainty,
+        "level": levels,
+    }
+
+
+def _great_circle(lat1: float, lon1: float, lat2: float, lon2: float, spacing: float):
+    """
+    Return (distance_m, points) for the great circle from 1 to 2, with points
+    every `spacing` meters or less, both ends included.
+    """
+    phi1, lam1, phi2, lam2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin((lam2 - lam1) / 2) ** 2)
+    delta = 2 * math.asin(min(1.0, math.sqrt(a)))
+    distance = delta * EARTH_RADIUS_M
+    if delta == 0:
+        return 0.0, [(lat1, lon1)]
+
+    # Interpolate on the unit sphere between the two end vectors
+    x1, y1, z1 = math.cos(phi1) * math.cos(lam1), math.cos(phi1) * math.sin(lam1), math.sin(phi1)
+    x2, y2, z2 = math.cos(phi2) * math.cos(lam2), math.cos(phi2) * math.sin(lam2), math.sin(phi2)
+    n = max(1, math.ceil(distance / spacing))
+    sin_delta = math.sin(delta)
+
+    points = []
+    for i in range(n + 1):
+        f = i / n
+        wa = math.sin((1 - f) * delta) / sin_delta
+        wb = math.sin(f * delta) / sin_delta
+        x = wa * x1 + wb * x2
+        y = wa * y1 + wb * y2
+        z = wa * z1 + wb * z2
+        points.append((math.degrees(math.atan2(z, math.hypot(x, y))),
+                       math.degrees(math.atan2(y, x))))
+    return distance, points
+
+
+def route_elevation_profile(
+    db: TerrainDB,
+    waypoints: Sequence[Tuple[float, float]],
+    spacing: float = 100.0,
+) -> dict:
+    """
+    Highest terrain along a route, per leg and overall (minimum safe altitude).
+
+    Each great-circle leg is sampled every `spacing` meters. Samples are
+    reduced to their finest-level tile first, and each distinct tile is
+    resolved once for the whole route (falling back to coarser levels for
+    empty tiles like query_elevation()), so the cost follows the number of
+    tiles crossed rather than the number of samples.
+
+    Args:
+        db: An open TerrainDB handle.
+        waypoints: Sequence of (lat, lon) in degrees, at least two.
+        spacing: Sample spacing along each leg, in meters.
+
+    Returns:
+        A dict with:
+            segments: One dict per leg with from, to (lat, lon), distance_nm,
+                max_elevation (meters, None if no data), level, and lat/lon
+                of the first sample that reached max_elevation.
+            max_elevation, lat, lon, level, segment: The highest point of
+                the whole route and the index of the leg it is on.
+            distance_nm: Total route length.
+            tiles: Number of distinct tiles visited.
+            unit: Always "meters".
+    """
+    if len(waypoints) < 2:
+        raise ValueError(f"need at least 2 waypoints, got {len(waypoints)}")
+    if spacing <= 0:
+        raise ValueError(f"spacing must be positive, got {spacing}")
+    for lat, lon in waypoints:
+        if not (-90 <= lat <= 90):
+            raise ValueError(f"lat must be -90 to 90, got {lat}")
+        if not (-180 <= lon <= 180):
+            raise ValueError(f"lon must be -180 to 180, got {lon}")
+
+    # (lat_idx, lon_idx) at level 0 -> (max_elev, level) or None
+    tiles = {}
+
+    def tile_max(lat, lon):
+        key = _tile_index(db, 0, lat, lon)
+        if key in tiles:
+            return tiles[key]
+
+        result = None
+        finest = _finest_level(db, *key)
+        for level in range(finest, NUM_LEVELS):
+            lat_idx, lon_idx = key if level == 0 else _tile_index(db, level, lat, lon)
+            (_, size, flags), (max_elev, _, _) = _read_tile(db, level, lat_idx, lon_idx)
+            if flags != 2 or size < TILE_HEADER_SIZE:
+                continue
+            if max_elev is not None:
+                result = (max_elev, level)
+            break
+
+        tiles[key] = result
+        return result
+
+    segments = []
+    best = None
+    total = 0.0
+    for i in range(len(waypoints) - 1):
+        (lat1, lon1), (lat2, lon2) = waypoints[i], waypoints[i + 1]
+        distance, points = _great_circle(lat1, lon1, lat2, lon2, spacing)
+        total += distance
+
+        seg = {
+            "from": (lat1, lon1),
+            "to": (lat2, lon2),
+            "distance_nm": round(distance / METERS_PER_NM, 3),
+            "max_elevation": None,
+            "level": None,
+            "lat": None,
+            "lon": None,
+        }
+        for lat, lon in points:
+            result = tile_max(lat, lon)
+            if result and (seg["max_elevation"] is None or result[0] > seg["max_elevation"]):
+                seg["max_elevation"], seg["level"] = result
+                seg["lat"], seg["lon"] = round(lat, 6), round(lon, 6)
+        segments.append(seg)
+
+        if seg["max_elevation"] is not None and (
+                best is None or seg["max_elevation"] > segments[best]["max_elevation"]):
+            best = i
+
+    top = segments[best] if best is not None else {}
+    return {
+        "segments": segments,
+        "max_elevation": top.get("max_elevation"),
+        "lat": top.get("lat"),
+        "lon": top.get("lon"),
+        "level": top.get("level"),
+        "segment": best,
+        "distance_nm": round(total / METERS_PER_NM, 3),
+        "tiles": len(tiles),
+        "unit": "meters",
+    }
+
+
 def get_elevation(path: str, lat: float, lon: float, level: int = 0) -> Optional[dict]:
     """One-shot elevation query. Opens the file, queries, and closes."""
     db = open_terrain_db(path)
@@ -212,6 +708,203 @@ def get_elevation(path: str, lat: float, lon: float, level: int = 0) -> Optional
         db.close()
 
 
+# ---------------------------------------------------------------------------
+# HTTP service
+# ---------------------------------------------------------------------------
+
+# Latencies kept for the stats percentiles, and the largest accepted body
+LATENCY_WINDOW = 10000
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+HTTP_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+def _percentile(values, q):
+    """Nearest-rank percentile of a sorted list."""
+    rank = max(1, math.ceil(q / 100.0 * len(values)))
+    return values[rank - 1]
+
+
+class ElevationServer:
+    """
+    HTTP/1.1 JSON front end for one open TerrainDB.
+
+    Endpoints:
+        GET  /elevation?lat=..&lon=..[&level=..]  query_elevation() result,
+             404 when there is no data.
+        POST /elevation  {"points": [[lat, lon], ...], "level": 0}
+             query_elevations() columns as JSON lists, null where no data.
+        GET  /stats  request counts, latency percentiles (ms) over the last
+             LATENCY_WINDOW requests, and the tile cache counters.
+
+    Queries are in-memory work on the mmap'd handle, so they run directly
+    on the event loop; concurrency comes from overlapping client I/O.
+    """
+
+    def __init__(self, db: TerrainDB, latency_window: int = LATENCY_WINDOW):
+        self.db = db
+        self.latencies = deque(maxlen=latency_window)  # seconds
+        self.requests = 0
+        self.errors = 0
+        self.points = 0
+        self.started = time.monotonic()
+
+    def handle(self, method: str, target: str, body: bytes = b"") -> Tuple[int, dict]:
+        """Serve one request. Returns (HTTP status, JSON-able dict)."""
+        url = urlsplit(target)
+        if url.path == "/stats":
+            if method != "GET":
+                return 405, {"error": "use GET"}
+            return 200, self.stats()
+        if url.path != "/elevation":
+            return 404, {"error": f"no such endpoint: {url.path}"}
+        if method not in ("GET", "POST"):
+            return 405, {"error": "use GET or POST"}
+
+        try:
+            if method == "GET":
+                query = parse_qs(url.query)
+                lat = float(query["lat"][0])
+                lon = float(query["lon"][0])
+                level = int(query.get("level", ["0"])[0])
+                result = query_elevation(self.db, lat, lon, level)
+                self.points += 1
+                if result is None:
+                    return 404, {"lat": lat, "lon": lon, "error": "no data"}
+                return 200, result
+
+            request = json.loads(body)
+            points = request["points"]
+            lats = [float(p[0]) for p in points]
+            lons = [float(p[1]) for p in points]
+            columns = query_elevations(self.db, lats, lons, int(request.get("level", 0)))
+            self.points += len(points)
+        except (KeyError, IndexError, TypeError, ValueError, OverflowError) as e:
+            # json.JSONDecodeError is a ValueError; int() of an infinite
+            # float such as a JSON 1e400 raises OverflowError
+            return 400, {"error": f"{type(e).__name__}: {e}"}
+
+        result = {"count": len(points), "unit": "meters"}
+        for name, column in columns.items():
+            if column.typecode == "d":
+                result[name] = [None if v != v else v for v in column]
+            else:
+                result[name] = [None if v < 0 else v for v in column]
+        return 200, result
+
+    def stats(self) -> dict:
+        """Request counters, latency percentiles in ms and cache counters."""
+        latencies = sorted(self.latencies)
+        latency_ms = {"count": len(latencies)}
+        for name, q in (("p50", 50), ("p90", 90), ("p99", 99), ("max", 100)):
+            latency_ms[name] = round(_percentile(latencies, q) * 1000, 3) if latencies else None
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "points": self.points,
+            "uptime_s": round(time.monotonic() - self.started, 3),
+            "latency_ms": latency_ms,
+            "cache": self.db.cache_stats(),
+        }
+
+    async def _client(self, reader, writer):
+        """Serve requests on one connection until either side closes it."""
+        import asyncio
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                t0 = time.perf_counter()
+                try:
+                    method, target, version = line.decode("latin-1").split()
+                except ValueError:
+                    break
+
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = h.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" and (
+                    version == "HTTP/1.1" or connection == "keep-alive")
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= MAX_BODY_SIZE:
+                    status, result = 413, {"error": f"body over {MAX_BODY_SIZE} bytes"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    try:
+                        status, result = self.handle(method, target, body)
+                    except Exception as e:
+                        # Whatever the input, answer rather than drop the
+                        # connection
+                        status, result = 500, {"error": f"{type(e).__name__}: {e}"}
+
+                payload = json.dumps(result).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                    f"\r\n".encode("latin-1") + payload
+                )
+                await writer.drain()
+
+                self.requests += 1
+                if status >= 400:
+                    self.errors += 1
+                self.latencies.append(time.perf_counter() - t0)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080):
+        """Start listening and return the asyncio.Server (port 0 picks one)."""
+        import asyncio
+
+        return await asyncio.start_server(self._client, host, port)
+
+
+def serve(path: str, host: str = "127.0.0.1", port: int = 8080, level_map: bool = False):
+    """Serve a trn.dat over HTTP with one mmap'd handle until interrupted."""
+    import asyncio
+
+    db = open_terrain_db(path, use_mmap=True, level_map=level_map)
+
+    async def run():
+        server = await ElevationServer(db).start(host, port)
+        for sock in server.sockets:
+            print("Serving %s on http://%s:%d" % (path, *sock.getsockname()[:2]), flush=True)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        db.close()
+
+
 # ---------------------------------------------------------------------------
 # CLI interface
 # ---------------------------------------------------------------------------
@@ -221,6 +914,7 @@ if __name__ == "__main__":
     def usage():
         print("Usage: python trn_elevation.py <trn.dat> <lat> <lon>")
         print("       python trn_elevation.py <trn.dat> --test")
+        print("       python trn_elevation.py <trn.dat> --serve [[HOST:]PORT]")
         sys.exit(1)
 
     if len(sys.argv) < 3:
@@ -258,6 +952,10 @@ if __name__ == "__main__":
                 print(f"{name:<20s} {expected:>8d}   (no data)")
         db.close()
 
+    elif sys.argv[2] == "--serve":
+        host, _, port = (sys.argv[3] if len(sys.argv) > 3 else "8080").rpartition(":")
+        serve(db_path, host or "127.0.0.1", int(port), level_map=True)
+
     elif len(sys.argv) >= 4:
         lat = float(sys.argv[2])
         lon = float(sys.argv[3])
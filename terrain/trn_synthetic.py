@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+"""
+Write synthetic Garmin trn.dat (TDB2) files for tests and benchmarks.
+
+The file has the same header / level table / root pointer / flat index /
+tile layout that trn_elevation reads, with random tile elevations, so the
+query paths can be exercised and timed without the proprietary database.
+
+Usage:
+    from trn_synthetic import write_synthetic_db
+    write_synthetic_db("trn.dat", finest_res_deg=0.17578125, empty_ratio=0.3)
+
+    python trn_synthetic.py trn.dat [--res DEG] [--empty-ratio R] [--seed N]
+"""
+
+import argparse
+import random
+import struct
+
+from trn_elevation import (
+    FLAT_INDEX_OFFSET,
+    INDEX_ENTRY,
+    INDEX_ENTRY_SIZE,
+    LEVEL_RECORD_SIZE,
+    LEVEL_TABLE_OFFSET,
+    NUM_LEVELS,
+    SEMICIRCLE_TO_DEG,
+    TILE_HEADER,
+    TILE_HEADER_SIZE,
+)
+
+# Resolution of the coarsest level (90°) in semicircles
+MAX_RESOLUTION = 2 ** 30
+
+# Resolution of the finest level in the Garmin file
+GARMIN_RES_DEG = 0.17578125
+
+
+def write_synthetic_db(path, finest_res_deg=0.703125, empty_ratio=0.5, seed=0,
+                       empty_decay=2.0, data_size=8):
+    """Write a synthetic TDB2 file and return its path.
+
+    Level k has resolution finest_res_deg * 2**k (capped at 90°), so
+    finest_res_deg sets the tile density: GARMIN_RES_DEG matches the real
+    file (2M level 0 tiles), the 0.703125 default is 16x sparser and quick
+    to write.
+
+    Level 0 tiles are empty with probability empty_ratio, and level k with
+    empty_ratio / empty_decay**k. The coarsest level is always populated, so
+    the coarser-level fallback always ends with data; empty_ratio=1 with
+    empty_decay=1 makes every query fall back all the way to it.
+
+    Each populated tile has data_size bytes of (zero) elevation data after
+    its header.
+    """
+    rng = random.Random(seed)
+    base = round(finest_res_deg / SEMICIRCLE_TO_DEG)
+    levels = []
+    for k in range(NUM_LEVELS):
+        resolution = min(base << k, MAX_RESOLUTION)
+        res_deg = resolution * SEMICIRCLE_TO_DEG
+        levels.append((resolution, round(180.0 / res_deg), round(360.0 / res_deg)))
+
+    total = sum(lt * lo for _, lt, lo in levels)
+    index = bytearray(total * INDEX_ENTRY_SIZE)
+    tiles = bytearray()
+    tiles_offset = FLAT_INDEX_OFFSET + len(index)
+    size = TILE_HEADER_SIZE + data_size
+
+    entry = 0
+    for k, (_, lat_tiles, lon_tiles) in enumerate(levels):
+        p_empty = 0.0 if k == NUM_LEVELS - 1 else empty_ratio / (empty_decay ** k)
+        for _ in range(lat_tiles * lon_tiles):
+            if rng.random() >= p_empty:
+                min_elev = rng.randrange(-400, 6000)
+                max_elev = min_elev + rng.randrange(0, 800)
+                INDEX_ENTRY.pack_into(index, entry * INDEX_ENTRY_SIZE,
+                                      tiles_offset + len(tiles),
+                                      size & 0xFFFF, size >> 16, 2)
+                tiles += TILE_HEADER.pack(max_elev, min_elev, data_size)
+                tiles += bytes(data_size)
+            entry += 1
+
+    with open(path, "wb") as f:
+        f.write(b"TDB2\x00\x00\x00")
+        for k, (resolution, _, _) in enumerate(levels):
+            rec = bytearray(LEVEL_RECORD_SIZE)
+            struct.pack_into("<II", rec, 0, k, resolution)
+            f.write(rec)
+        assert f.tell() == LEVEL_TABLE_OFFSET + NUM_LEVELS * LEVEL_RECORD_SIZE
+        f.write(bytes(FLAT_INDEX_OFFSET - f.tell()))
+        f.write(index)
+        f.write(tiles)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic trn.dat (TDB2) file.")
+    parser.add_argument("path", help="Output file")
+    parser.add_argument("--res", type=float, default=0.703125,
+                        help=f"Finest tile size in degrees, {GARMIN_RES_DEG} "
+                             "like Garmin (default: %(default)s)")
+    parser.add_argument("--empty-ratio", type=float, default=0.5,
+                        help="Fraction of empty level-0 tiles (default: %(default)s)")
+    parser.add_argument("--empty-decay", type=float, default=2.0,
+                        help="Empty ratio divisor per coarser level (default: %(default)s)")
+    parser.add_argument("--data-size", type=int, default=8,
+                        help="Elevation data bytes per tile (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Random seed (default: %(default)s)")
+    args = parser.parse_args()
+
+    write_synthetic_db(args.path, args.res, args.empty_ratio, args.seed,
+                       args.empty_decay, args.data_size)
+
+
+if __name__ == "__main__":
+    main()
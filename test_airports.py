@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""Tests for the airport index of airports.py."""
+
+import argparse
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+from airports import (
+    INDEX_VERSION,
+    build_index,
+    index_is_current,
+    main,
+    scan_database,
+    scan_index,
+)
+from bench_airports import generate
+
+WANTED = {"KX00", "KX03", "X00004", "KX30", "X00059", "NOPE"}
+
+
+@pytest.fixture
+def database(tmp_path):
+    # gml:pos is written as "%.6f %.6f", trailing zeros and all
+    path = str(tmp_path / "APT_AIXM.xml")
+    generate(path, 60)
+    return path
+
+
+def _meta(index, key):
+    conn = sqlite3.connect(index)
+    try:
+        return conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_index_matches_scan(database):
+    index = database + ".sqlite"
+    expected = list(scan_database(database, WANTED))
+    assert len(expected) == 5
+    assert list(scan_index(index, database, WANTED)) == expected
+
+
+def test_kml_identical(database, tmp_path):
+    wanted = tmp_path / "wanted.txt"
+    wanted.write_text("\n".join(sorted(WANTED)) + "\n")
+
+    outputs = []
+    for index in (None, True):
+        output = str(tmp_path / f"out-{index}.kml")
+        main(argparse.Namespace(database=database, airports=str(wanted), output=output,
+                                foreflight=False, index=index, build_index=False))
+        with open(output, "rb") as fd:
+            outputs.append(fd.read())
+    assert outputs[0] == outputs[1]
+    # The gml:pos text is kept as is, 6 decimals and all
+    coords = re.findall(rb"<coordinates>(.*?)</coordinates>", outputs[0])
+    assert len(coords) == 5
+    assert all(re.fullmatch(rb"-?\d+\.\d{6},-?\d+\.\d{6}", c) for c in coords)
+
+
+class TestIndexIsCurrent:
+    def test_fresh(self, database):
+        index = database + ".sqlite"
+        assert not index_is_current(index, database)
+        build_index(index, database)
+        assert index_is_current(index, database)
+        assert _meta(index, "version") == INDEX_VERSION
+
+    def test_touched_but_unchanged(self, database):
+        index = database + ".sqlite"
+        build_index(index, database)
+        st = os.stat(database)
+        os.utime(database, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+        # The sha256 matches, and the new mtime is recorded for next time
+        assert index_is_current(index, database)
+        assert _meta(index, "mtime_ns") == str(st.st_mtime_ns + 10**9)
+
+    def test_same_size_changed(self, database):
+        index = database + ".sqlite"
+        build_index(index, database)
+        st = os.stat(database)
+        with open(database, "r+b") as fd:
+            data = fd.read()
+            fd.seek(data.index(b"AIRPORT 1<"))
+            fd.write(b"AIRPORT 9<")
+        os.utime(database, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        assert os.stat(database).st_size == st.st_size
+        assert not index_is_current(index, database)
+
+    def test_size_changed(self, database):
+        index = database + ".sqlite"
+        build_index(index, database)
+        generate(database, 61)
+        assert not index_is_current(index, database)
+
+    def test_old_version(self, database):
+        index = database + ".sqlite"
+        build_index(index, database)
+        conn = sqlite3.connect(index)
+        conn.execute("UPDATE meta SET value = '1' WHERE key = 'version'")
+        conn.commit()
+        conn.close()
+        assert not index_is_current(index, database)
+
+    def test_not_an_index(self, database):
+        index = database + ".sqlite"
+        with open(index, "w") as fd:
+            fd.write("not sqlite")
+        assert not index_is_current(index, database)
+
+
+def test_rebuilt_when_source_changes(database):
+    index = database + ".sqlite"
+    before = list(scan_index(index, database, WANTED))
+
+    generate(database, 60, seed=1)
+    after = list(scan_index(index, database, WANTED))
+    assert after != before
+    assert after == list(scan_database(database, WANTED))
+    assert index_is_current(index, database)
+
+
+def test_duplicate_identifiers(database):
+    # The same identifier twice, at different places: both paths keep both,
+    # in database order
+    with open(database, encoding="utf-8") as fd:
+        xml = fd.read()
+    start = xml.index("<message:hasMember>")
+    end = xml.index("</message:hasMember>", start) + len("</message:hasMember>")
+    first = xml[start:end]
+    assert "KX00" in first
+    copy = re.sub(r"<gml:pos>[^<]*</gml:pos>", "<gml:pos>1.000000 2.000000</gml:pos>", first)
+    xml = xml.replace("</message:AIXMBasicMessage>", copy + "\n</message:AIXMBasicMessage>")
+    with open(database, "w", encoding="utf-8") as fd:
+        fd.write(xml)
+
+    expected = list(scan_database(database, WANTED))
+    assert [loc for loc, _ in expected].count("KX00") == 2
+    assert expected[-1] == ("KX00", "1.000000,2.000000")
+    assert list(scan_index(database + ".sqlite", database, WANTED)) == expected
+
+
+def _airports(*args, cwd):
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "airports.py")
+    return subprocess.run([sys.executable, script, *args], cwd=cwd,
+                          capture_output=True, text=True)
+
+
+class TestCommandLine:
+    def test_build_index(self, database, tmp_path):
+        result = _airports("--build-index", database, cwd=tmp_path)
+        assert result.returncode == 0, result.stderr
+        assert index_is_current(database + ".sqlite", database)
+
+        other = str(tmp_path / "other.sqlite")
+        assert _airports("--build-index", "--index", other, database,
+                         cwd=tmp_path).returncode == 0
+        assert index_is_current(other, database)
+
+    def test_database_named_index(self, database, tmp_path):
+        os.rename(database, tmp_path / "index")
+        (tmp_path / "wanted.txt").write_text("KX00\n")
+        result = _airports("index", "wanted.txt", "out.kml", cwd=tmp_path)
+        assert result.returncode == 0, result.stderr
+        assert b"<name>KX00</name>" in (tmp_path / "out.kml").read_bytes()
+
+    def test_output_required(self, database, tmp_path):
+        result = _airports(database, cwd=tmp_path)
+        assert result.returncode == 2
+        assert "required: airports, output" in result.stderr
+
+    def test_help(self, tmp_path):
+        assert "--build-index" in _airports("--help", cwd=tmp_path).stdout
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Tests for the fix selection of faa_fixes_to_kml.py."""
+
+import random
+
+import numpy as np
+import pytest
+
+from bench_faa_fixes import dms
+from faa_fixes_to_kml import (
+    readFixesArray,
+    selectScalar,
+    selectVectorized,
+    withinRadiusArray,
+)
+
+CENTERS = [
+    (37.61946088067242, -122.3738855647427),  # KSFO
+    (-16.5, 179.8),  # across the antimeridian
+    (52.0, -179.9),
+    (88.5, 10.0),  # the box wraps all the way around
+    (-89.9, -45.0),
+    (0.0, 0.0),
+]
+
+
+@pytest.fixture(scope="module")
+def fix_file(tmp_path_factory):
+    # Fixes all over the globe, bunched near the centers so every radius
+    # catches some
+    path = str(tmp_path_factory.mktemp("fixes") / "FIX.txt")
+    rng = random.Random(7)
+    points = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(3000)]
+    for lat, lon in CENTERS:
+        for _ in range(300):
+            plat = max(-90, min(90, lat + rng.gauss(0, 3)))
+            plon = (lon + rng.gauss(0, 5) + 180) % 360 - 180
+            points.append((plat, plon))
+
+    with open(path, "w", encoding="ascii") as f:
+        for i, (lat, lon) in enumerate(points):
+            f.write("FIX1" + f"FX{i:05d}".ljust(30) + "STATE".ljust(30) + "K2"
+                    + dms(lat, "N", "S").ljust(14) + dms(lon, "E", "W").ljust(14)
+                    + " " * 40 + "WAYPOINT\n")
+            f.write("FIX2" + f"FX{i:05d}".ljust(30) + "STATE".ljust(30) + "K2 VOR*123.45\n")
+    return path
+
+
+def _brute_force(fname, centers, radius):
+    # Every fix through the exact distance test, no grid
+    lines, lat, lon = readFixesArray(fname)
+    wanted = np.flatnonzero(withinRadiusArray(lat, lon, centers, radius))
+    return [(lines[i][4:34].strip().decode("ascii"), lat[i], lon[i]) for i in wanted]
+
+
+@pytest.mark.parametrize("size", [0.25, 1.0, 7.0])
+@pytest.mark.parametrize("radius", [1, 50, 400, 3000])
+def test_matches_brute_force(fix_file, radius, size):
+    for center in CENTERS:
+        expected = _brute_force(fix_file, [center], radius)
+        assert selectVectorized(fix_file, [center], radius, size) == expected
+
+    expected = _brute_force(fix_file, CENTERS, radius)
+    assert expected
+    assert selectVectorized(fix_file, CENTERS, radius, size) == expected
+
+
+@pytest.mark.parametrize("radius", [50, 400])
+def test_matches_scalar(fix_file, radius):
+    vector = selectVectorized(fix_file, CENTERS, radius, 1.0)
+    scalar = selectScalar(fix_file, CENTERS, radius, 1.0)
+    assert [name for name, _, _ in vector] == [name for name, _, _ in scalar]
+
+
+def test_no_centers(fix_file):
+    selected = selectVectorized(fix_file, [], 50, 1.0)
+    assert len(selected) == 3000 + 300 * len(CENTERS)
+    assert selected == _brute_force(fix_file, [(0, 0)], 10800)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Tests for faa_nav_to_kml.py."""
+
+import argparse
+import os
+import subprocess
+import sys
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from faa_nav_to_kml import main, typeList
+
+KML = "{http://www.opengis.net/kml/2.2}"
+DEFAULT_SKIP = typeList("OTHER:VOT,TACAN")
+
+
+def _navaid(i, designator, typ, pos="-122.37 37.62", extra=""):
+    pos = f"<gml:pos>{pos}</gml:pos>" if pos else ""
+    return f"""<message:hasMember>
+<aixm:Navaid gml:id="N_{i}"><aixm:timeSlice>
+<aixm:NavaidTimeSlice gml:id="NT_{i}">
+<aixm:designator>{designator}</aixm:designator>
+<aixm:name>NAVAID {designator}</aixm:name>
+<aixm:type>{typ}</aixm:type>
+<aixm:location><aixm:ElevatedPoint gml:id="EP_{i}">{pos}</aixm:ElevatedPoint></aixm:location>
+{extra}
+</aixm:NavaidTimeSlice>
+</aixm:timeSlice></aixm:Navaid>
+</message:hasMember>
+"""
+
+
+@pytest.fixture
+def nav_file(tmp_path):
+    members = [
+        _navaid(0, "SFO", "VOR"),
+        _navaid(1, "OAK", "VORTAC", pos="-122.22 37.73"),
+        _navaid(2, "NUQ", "TACAN"),
+        _navaid(3, "VT1", "OTHER:VOT"),
+        _navaid(4, "NOPOS", "VOR", pos=None),
+        # Only the first of each field counts
+        _navaid(5, "PAO", "NDB", extra="<aixm:component><aixm:designator>ZZZ</aixm:designator>"
+                "<aixm:type>TACAN</aixm:type></aixm:component>"),
+        # Not a Navaid, even though it has all the fields
+        _navaid(6, "RWY", "VOR").replace("aixm:Navaid", "aixm:Runway"),
+    ]
+    path = tmp_path / "NAV_AIXM.xml"
+    path.write_text('<?xml version="1.0" encoding="UTF-8"?>\n'
+                    '<message:AIXMBasicMessage'
+                    ' xmlns:message="http://www.aixm.aero/schema/5.1/message"'
+                    ' xmlns:aixm="http://www.aixm.aero/schema/5.1"'
+                    ' xmlns:gml="http://www.opengis.net/gml/3.2" gml:id="M">\n'
+                    + "".join(members) + "</message:AIXMBasicMessage>\n")
+    return str(path)
+
+
+def _convert(nav_file, tmp_path, types=None, skip_types=DEFAULT_SKIP):
+    output = str(tmp_path / "nav.kml")
+    main(argparse.Namespace(file=nav_file, output=output, types=types, skip_types=skip_types))
+    placemarks = ET.parse(output).getroot().iter(KML + "Placemark")
+    return {p.findtext(KML + "name"): (p.findtext(KML + "description"),
+                                       p.findtext(f"{KML}Point/{KML}coordinates"))
+            for p in placemarks}
+
+
+def test_default_skip_list(nav_file, tmp_path):
+    navaids = _convert(nav_file, tmp_path)
+    assert sorted(navaids) == ["OAK", "PAO", "SFO"]
+    assert navaids["OAK"] == ("NAVAID OAK\nVORTAC", "-122.22,37.73")
+    assert navaids["PAO"] == ("NAVAID PAO\nNDB", "-122.37,37.62")
+
+
+def test_types(nav_file, tmp_path):
+    assert sorted(_convert(nav_file, tmp_path, types={"VOR", "TACAN"})) == ["NUQ", "SFO"]
+
+
+def test_skip_types(nav_file, tmp_path):
+    navaids = _convert(nav_file, tmp_path, skip_types={"VOR"})
+    assert sorted(navaids) == ["NUQ", "OAK", "PAO", "VT1"]
+
+
+def test_types_and_skip_types_rejected(nav_file, tmp_path):
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "faa_nav_to_kml.py")
+    result = subprocess.run([sys.executable, script, nav_file, str(tmp_path / "nav.kml"),
+                             "--types", "VOR", "--skip-types", "TACAN"],
+                            capture_output=True, text=True)
+    assert result.returncode == 2
+    assert "not allowed with argument --types" in result.stderr
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Tests for g1000_png.py."""
+
+import argparse
+import glob
+import hashlib
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+from PIL import Image
+
+import g1000_png
+
+
+@pytest.fixture
+def font(monkeypatch):
+    # FONT is a macOS path; fall back to any TrueType font around
+    candidates = [g1000_png.FONT] + sorted(glob.glob("/usr/share/fonts/**/*.ttf", recursive=True))
+    for path in candidates:
+        if os.path.exists(path):
+            # The pool forks, so the workers see the patched module too
+            monkeypatch.setattr(g1000_png, "FONT", path)
+            return path
+    pytest.skip("no TrueType font available")
+
+
+def _write_log(path, rows):
+    # rows: one {key: value} per log line, over zeros for everything else
+    with open(path, "w", encoding="ascii") as f:
+        f.write("#airframe_info, log_version=\"1.00\"\n")
+        f.write(", ".join(g1000_png.keys) + "\n")
+        for row in rows:
+            values = dict.fromkeys(g1000_png.keys, "0")
+            values.update({"Lcl Date": "2024-05-01", "Latitude": "37.5", "Longitude": "-122.25"})
+            values.update(row)
+            f.write(", ".join(values[k] for k in g1000_png.keys) + "\n")
+
+
+def _run(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["g1000_png.py", *argv])
+    g1000_png.main()
+
+
+def _pngs(outdir):
+    names = sorted(os.listdir(outdir))
+    data = {}
+    for name in names:
+        with open(os.path.join(outdir, name), "rb") as f:
+            data[name] = f.read()
+    return data
+
+
+def test_rerun_over_linked_frames(font, tmp_path, monkeypatch):
+    # Every fifth row changes, so the first run hard-links 4 of 5 frames
+    repeated = tmp_path / "repeated.csv"
+    _write_log(repeated, [{"Lcl Time": f"10:00:{i // 5:02d}"} for i in range(40)])
+    distinct = tmp_path / "distinct.csv"
+    _write_log(distinct, [{"Lcl Time": f"11:00:{i:02d}", "AltInd": str(1000 + i)}
+                          for i in range(40)])
+
+    out = tmp_path / "out"
+    clean = tmp_path / "clean"
+    out.mkdir()
+    clean.mkdir()
+    size = ["--width", "320", "--height", "200"]
+    _run(monkeypatch, str(repeated), "--outdir", str(out), *size)
+    assert os.stat(out / "000001.png").st_ino == os.stat(out / "000000.png").st_ino
+
+    _run(monkeypatch, str(distinct), "--outdir", str(out), *size)
+    _run(monkeypatch, str(distinct), "--outdir", str(clean), *size)
+
+    expected = _pngs(clean)
+    assert len(expected) == 40
+    assert len(set(expected.values())) == 40
+    assert _pngs(out) == expected
+
+
+def _egt_jobs(count, seed=0):
+    # Random EGT frames plus some that push bars off the top of the frame
+    # and under the FF/MAP readouts, where text has to be blended
+    rng = random.Random(seed)
+    contents = [((3000, 0, 1100, 1101), (1200, 0, 200, 201), 150.0, 250.0),
+                ((0, 0, 0, 0), (0, 0, 0, 0), 0, 0)]
+    while len(contents) < count:
+        egts = tuple(rng.randint(1000, 1800) for _ in range(4))
+        chts = tuple(rng.randint(150, 500) for _ in range(4))
+        ff = round(rng.uniform(0, 40), 1)
+        mp = round(rng.uniform(10, 80), 1)
+        contents.append((egts, chts, ff, mp))
+    return [(i, f"frame {i}", content) for i, content in enumerate(contents)]
+
+
+def _render(monkeypatch, handler, jobs, numpy):
+    # Fresh per-worker state, as a pool process would have
+    for name in ("args", "font", "canvas", "draw", "np", "frame", "background", "solid", "ink"):
+        monkeypatch.setattr(g1000_png, name, None)
+    monkeypatch.setattr(g1000_png, "dirty", [])
+    g1000_png.textPatch.cache_clear()
+    g1000_png.initWorker(argparse.Namespace(width=1920, height=1080, numpy=numpy, mp4="-"))
+    try:
+        return [hashlib.sha256(handler(job)[1]).hexdigest() for job in jobs]
+    finally:
+        g1000_png.textPatch.cache_clear()
+
+
+def test_numpy_matches_pil(font, monkeypatch, capsys):
+    pytest.importorskip("numpy")
+    jobs = _egt_jobs(200)
+    expected = _render(monkeypatch, g1000_png.processEGT, jobs, False)
+    actual = _render(monkeypatch, g1000_png.processEGTNumpy, jobs, True)
+    assert len(set(expected)) > 100
+    for job, want, got in zip(jobs, expected, actual):
+        assert got == want, f"frame {job[0]} differs: {job[2]}"
+
+
+class TestReleaseFrames:
+    def test_waits_for_its_turn(self):
+        pending = {1: b"b", 2: None}
+        assert g1000_png.releaseFrames(pending, 0, None) == ([], 0, None)
+        assert pending == {1: b"b", 2: None}
+
+    def test_repeats_follow_last(self):
+        pending = {0: b"a", 1: None, 2: None, 4: b"e"}
+        assert g1000_png.releaseFrames(pending, 0, None) == ([b"a"] * 3, 3, b"a")
+        assert pending == {4: b"e"}
+
+    def test_repeat_of_previous_batch(self):
+        pending = {5: None, 6: None}
+        assert g1000_png.releaseFrames(pending, 5, b"x") == ([b"x", b"x"], 7, b"x")
+        assert pending == {}
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_shuffled_batches(self, seed):
+        # Drive it the way main() does: repeats go in when a batch is formed,
+        # rendered frames as they come back in any order, then the batch
+        # is flushed. Runs of repeats cross batch boundaries.
+        rng = random.Random(seed)
+        repeat = [False] + [rng.random() < 0.6 for _ in range(99)]
+        expected_frames = []
+        for i, r in enumerate(repeat):
+            expected_frames.append(expected_frames[-1] if r else bytes([i]))
+
+        out = []
+        pending, expected, last = {}, 0, None
+        window = rng.randint(1, 7)
+        for start in range(0, len(repeat), window):
+            batch = range(start, min(start + window, len(repeat)))
+            jobs = [i for i in batch if not repeat[i]]
+            for i in batch:
+                if repeat[i]:
+                    pending[i] = None
+            rng.shuffle(jobs)
+            for i in jobs:
+                pending[i] = bytes([i])
+                ready, expected, last = g1000_png.releaseFrames(pending, expected, last)
+                out += ready
+            ready, expected, last = g1000_png.releaseFrames(pending, expected, last)
+            out += ready
+            assert not pending
+
+        assert out == expected_frames
+
+
+def _fake_ffmpeg(script):
+    def start():
+        return subprocess.Popen([sys.executable, "-c", script], stdin=subprocess.PIPE)
+    return start
+
+
+def test_mp4_frames_in_order(font, tmp_path, monkeypatch):
+    # Frames piped to ffmpeg match the PNGs of the same log, in order
+    log = tmp_path / "repeated.csv"
+    _write_log(log, [{"Lcl Time": f"10:00:{i // 5:02d}", "AltInd": str(i // 3)}
+                     for i in range(40)])
+    size = ["--width", "320", "--height", "200"]
+    _run(monkeypatch, str(log), "--outdir", str(tmp_path), *size)
+
+    raw = tmp_path / "raw"
+    monkeypatch.setattr(g1000_png, "startFFmpeg", _fake_ffmpeg(
+        f"import shutil, sys; shutil.copyfileobj(sys.stdin.buffer, open({str(raw)!r}, 'wb'))"))
+    _run(monkeypatch, str(log), "--mp4", "out.mp4", *size)
+
+    frames = raw.read_bytes()
+    assert len(frames) == 40 * 320 * 200 * 3
+    for i in range(40):
+        with Image.open(tmp_path / f"{i:06d}.png") as png:
+            assert png.tobytes() == frames[i * 192000:(i + 1) * 192000], f"frame {i}"
+
+
+def test_ffmpeg_exits_early(font, tmp_path, monkeypatch, capsys):
+    log = tmp_path / "log.csv"
+    _write_log(log, [{"Lcl Time": f"10:00:{i:02d}"} for i in range(40)])
+    monkeypatch.setattr(g1000_png, "startFFmpeg", _fake_ffmpeg("import sys; sys.exit(3)"))
+    with pytest.raises(SystemExit) as e:
+        _run(monkeypatch, str(log), "--mp4", "out.mp4", "--width", "320", "--height", "200")
+    assert e.value.code == 1
+    assert "ffmpeg exited early with status 3" in capsys.readouterr().err
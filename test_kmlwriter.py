@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Tests for kmlwriter.py."""
+
+import gzip
+import xml.etree.ElementTree as ET
+import zipfile
+
+import pytest
+
+from kmlwriter import KML_NS, KMLWriter
+
+NS = f"{{{KML_NS}}}"
+
+
+def _write(path):
+    with KMLWriter(str(path), "Test & Co") as kml:
+        kml.placemark("KSFO", "-122.375,37.619")
+        kml.placemark("<A&B>", "1,2,0", description="line 1\nline \"2\"")
+        kml.placemark(None, "3,4")
+    return kml
+
+
+def _placemarks(root):
+    doc = root.find(f"{NS}Document")
+    return doc, doc.findall(f"{NS}Placemark")
+
+
+@pytest.mark.parametrize("suffix", [".kml", ".kml.gz", ".kmz"])
+def test_roundtrip(tmp_path, suffix):
+    path = tmp_path / f"out{suffix}"
+    kml = _write(path)
+    assert kml.count == 3
+
+    if suffix == ".kml.gz":
+        data = gzip.open(path).read()
+    elif suffix == ".kmz":
+        data = zipfile.ZipFile(path).read("doc.kml")
+    else:
+        data = path.read_bytes()
+
+    doc, places = _placemarks(ET.fromstring(data))
+    assert doc.find(f"{NS}name").text == "Test & Co"
+    assert [p.find(f"{NS}name").text for p in places] == ["KSFO", "<A&B>", None]
+    assert places[1].find(f"{NS}description").text == "line 1\nline \"2\""
+    assert places[0].find(f"{NS}description") is None
+    assert places[1].find(f"{NS}Point/{NS}coordinates").text == "1,2,0"
+
+
+def test_close_is_idempotent(tmp_path):
+    path = tmp_path / "out.kml"
+    kml = KMLWriter(str(path))
+    kml.close()
+    kml.close()
+    _, places = _placemarks(ET.parse(path).getroot())
+    assert places == []
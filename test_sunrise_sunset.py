@@ -2,6 +2,7 @@
 """Comprehensive tests for sunrise_sunset.py."""
 
 import math
+import os
 import subprocess
 import sys
 from datetime import date, datetime, timedelta, timezone
@@ -395,3 +396,503 @@ class TestSymmetry:
             rise2, _ = sunrise_sunset(48.0, 11.0, d2, utc_offset=2)
             diff = abs(_minutes(rise1) - _minutes(rise2))
             assert diff <= 4, f"Sunrise jumped {diff} min between {d1} and {d2}"
+
+
+# ---------------------------------------------------------------------------
+# Vectorized batch API
+# ---------------------------------------------------------------------------
+
+class TestBatch:
+    """sunrise_sunset_batch() must agree with the scalar function."""
+
+    def test_matches_scalar(self):
+        np = pytest.importorskip("numpy")
+        from sunrise_sunset import sunrise_sunset_batch
+
+        lats = np.array([40.7128, 51.5074, -33.8688, 0.0, 64.1466, 89.0, -89.0])
+        lons = np.array([-74.0060, -0.1278, 151.2093, 179.0, -21.9426, 0.0, 0.0])
+        dates = [date(2026, 1, 15) + timedelta(days=i * 37) for i in range(12)]
+        rise, sset, polar = sunrise_sunset_batch(
+            lats[:, None], lons[:, None], dates, utc_offset=-5)
+        assert rise.shape == (len(lats), len(dates))
+
+        for i in range(len(lats)):
+            for j, d in enumerate(dates):
+                r, s = sunrise_sunset(lats[i], lons[i], d, utc_offset=-5)
+                if r is None:
+                    assert polar[i, j]
+                    assert math.isnan(rise[i, j]) and math.isnan(sset[i, j])
+                else:
+                    assert not polar[i, j]
+                    assert abs(r.timestamp() - rise[i, j]) <= 1
+                    assert abs(s.timestamp() - sset[i, j]) <= 1
+
+    def test_polar_mask(self):
+        pytest.importorskip("numpy")
+        from sunrise_sunset import sunrise_sunset_batch
+
+        _, _, polar = sunrise_sunset_batch(
+            [89.0, -89.0, 45.0], [0.0, 0.0, 0.0], date(2026, 12, 21))
+        assert polar.tolist() == [True, True, False]
+
+
+# ---------------------------------------------------------------------------
+# Yearly tables
+# ---------------------------------------------------------------------------
+
+class TestTable:
+    """sunrise_sunset_table() and write_table() against the scalar function."""
+
+    def test_matches_scalar(self):
+        pytest.importorskip("numpy")
+        from sunrise_sunset import sunrise_sunset_table
+
+        lats = [40.7128, -33.8688, 64.1466, 89.0]
+        lons = [-74.0060, 151.2093, -21.9426, 0.0]
+        days = list(sunrise_sunset_table(lats, lons, date(2026, 1, 1), date(2026, 12, 31),
+                                         utc_offset=-3.5, chunk_days=50))
+        assert len(days) == 365
+        for d, rise, sset in days[::11]:
+            for i in range(len(lats)):
+                r, s = sunrise_sunset(lats[i], lons[i], d, utc_offset=-3.5)
+                if r is None:
+                    assert rise[i] == -1 and sset[i] == -1
+                else:
+                    assert rise[i] == r.hour * 3600 + r.minute * 60 + r.second
+                    assert sset[i] == s.hour * 3600 + s.minute * 60 + s.second
+
+    def test_write_csv_and_json(self, tmp_path):
+        pytest.importorskip("numpy")
+        import csv
+        import io
+        import json
+        from sunrise_sunset import read_locations, write_table
+
+        fname = tmp_path / "sites.csv"
+        fname.write_text('name,lat,lon\n# comment\n"Quito, EC",-0.1807,-78.4678\n89.0,0.0\n')
+        locations = read_locations(str(fname))
+        assert locations == [("Quito, EC", -0.1807, -78.4678), ("", 89.0, 0.0)]
+
+        out = io.StringIO()
+        write_table(out, locations, date(2026, 12, 20), date(2026, 12, 21), -5, "csv")
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        assert [(r["date"], r["name"]) for r in rows] == [
+            ("2026-12-20", "Quito, EC"), ("2026-12-20", ""),
+            ("2026-12-21", "Quito, EC"), ("2026-12-21", ""),
+        ]
+        rise, sset = sunrise_sunset(-0.1807, -78.4678, date(2026, 12, 21), utc_offset=-5)
+        assert rows[2]["sunrise"] == rise.strftime("%H:%M:%S")
+        assert rows[2]["sunset"] == sset.strftime("%H:%M:%S")
+        assert rows[3]["sunrise"] == rows[3]["sunset"] == ""
+
+        out = io.StringIO()
+        write_table(out, locations, date(2026, 12, 20), date(2026, 12, 21), -5, "json")
+        objs = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert [{k: o[k] for k in ("date", "name", "sunrise", "sunset")} for o in objs] == [
+            {k: r[k] or None for k in ("date", "name", "sunrise", "sunset")} | {"name": r["name"]}
+            for r in rows
+        ]
+
+
+# ---------------------------------------------------------------------------
+# Solar-term cache
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def cached(monkeypatch):
+    """Route this module's sunrise_sunset() calls through a shared cache."""
+    from functools import partial
+    from sunrise_sunset import SolarTermCache
+
+    cache = SolarTermCache(maxsize=64, lon_step=0.5)
+    monkeypatch.setattr(sys.modules[__name__], "sunrise_sunset",
+                        partial(sunrise_sunset, cache=cache))
+    return cache
+
+
+@pytest.mark.usefixtures("cached")
+class TestKnownLocationsCached(TestKnownLocations):
+    """The reference values hold with the cache and a coarse 0.5° bucket."""
+
+
+@pytest.mark.usefixtures("cached")
+class TestSeasonalPatternsCached(TestSeasonalPatterns):
+    pass
+
+
+@pytest.mark.usefixtures("cached")
+class TestSymmetryCached(TestSymmetry):
+    pass
+
+
+class TestSolarTermCache:
+    def test_close_to_uncached(self):
+        from sunrise_sunset import SolarTermCache
+
+        cache = SolarTermCache()
+        for i in range(400):
+            lat, lon = -65 + i * 0.33, -180 + i * 0.9
+            d = date(2026, 1, 1) + timedelta(days=i * 7 % 365)
+            r, s = sunrise_sunset(lat, lon, d, utc_offset=0)
+            rc, sc = sunrise_sunset(lat, lon, d, utc_offset=0, cache=cache)
+            if r is None:
+                assert rc is None and sc is None
+            else:
+                assert abs((r - rc).total_seconds()) <= 1
+                assert abs((s - sc).total_seconds()) <= 1
+
+    def test_counters(self):
+        from sunrise_sunset import SolarTermCache
+
+        cache = SolarTermCache(maxsize=2, lon_step=0.1)
+        d = date(2026, 6, 1)
+        sunrise_sunset(40.0, -74.00, d, utc_offset=-4, cache=cache)
+        sunrise_sunset(41.0, -74.02, d, utc_offset=-4, cache=cache)  # same bucket
+        sunrise_sunset(40.0, -74.00, date(2027, 6, 1), utc_offset=-4, cache=cache)
+        sunrise_sunset(40.0, -80.00, d, utc_offset=-4, cache=cache)  # evicts 2026/-74
+        sunrise_sunset(40.0, -74.00, d, utc_offset=-4, cache=cache)
+        assert cache.stats() == {
+            "size": 2, "capacity": 2, "hits": 1, "misses": 4, "evictions": 2,
+            "hit_rate": 0.2,
+        }
+        cache.clear()
+        assert cache.stats()["size"] == 0 and cache.hits == cache.misses == 0
+
+    def test_invalid(self):
+        from sunrise_sunset import SolarTermCache
+
+        with pytest.raises(ValueError):
+            SolarTermCache(maxsize=0)
+        with pytest.raises(ValueError):
+            SolarTermCache(lon_step=0)
+
+
+# ---------------------------------------------------------------------------
+# Solar events (noon and twilights)
+# ---------------------------------------------------------------------------
+
+class TestSolarEvents:
+    def test_sunrise_matches(self):
+        from sunrise_sunset import solar_events
+
+        for lat, lon, d, off in [(40.7128, -74.0060, date(2026, 1, 15), -5),
+                                 (-33.8688, 151.2093, date(2026, 6, 21), 10),
+                                 (89.0, 0.0, date(2026, 12, 21), 0)]:
+            events = solar_events(lat, lon, d, utc_offset=off, events=["sunrise"])
+            assert events["sunrise"] == sunrise_sunset(lat, lon, d, utc_offset=off)
+
+    def test_twilight_order(self):
+        from sunrise_sunset import solar_events
+
+        ev = solar_events(48.8566, 2.3522, date(2026, 3, 20), utc_offset=1)
+        order = [ev["astro"][0], ev["nautical"][0], ev["civil"][0], ev["sunrise"][0],
+                 ev["noon"],
+                 ev["sunrise"][1], ev["civil"][1], ev["nautical"][1], ev["astro"][1]]
+        assert order == sorted(order)
+        # Civil twilight lasts roughly half an hour at mid-latitudes
+        assert 25 <= (ev["sunrise"][0] - ev["civil"][0]).total_seconds() / 60 <= 45
+
+    def test_white_nights(self):
+        # London at the June solstice never gets astronomically dark
+        from sunrise_sunset import solar_events
+
+        ev = solar_events(51.5074, -0.1278, date(2026, 6, 21), utc_offset=1)
+        assert ev["astro"] == (None, None)
+        assert ev["nautical"][0] is not None
+
+    def test_custom_altitude(self):
+        from sunrise_sunset import solar_events
+
+        ev = solar_events(40.0, -74.0, date(2026, 6, 1), utc_offset=-4,
+                          events=["civil", -6.0])
+        assert ev["civil"] == ev[-6.0]
+
+    def test_table_matches_scalar(self):
+        pytest.importorskip("numpy")
+        from sunrise_sunset import solar_events, solar_events_table
+
+        names = ("sunrise", "civil", "nautical", "astro")
+        lats, lons = [51.5074, -33.9249, 70.0], [-0.1278, 18.4241, 25.0]
+        days = solar_events_table(lats, lons, date(2026, 1, 1), date(2026, 12, 31),
+                                  utc_offset=2, events=names)
+
+        def secs(dt):
+            return -1 if dt is None else dt.hour * 3600 + dt.minute * 60 + dt.second
+
+        for d, noon, times in list(days)[::17]:
+            for i in range(len(lats)):
+                ev = solar_events(lats[i], lons[i], d, utc_offset=2, events=names)
+                assert noon[i] == secs(ev["noon"])
+                for name, (morning, evening) in zip(names, times):
+                    assert (morning[i], evening[i]) == tuple(map(secs, ev[name]))
+
+
+class TestGrid:
+    """solar_grid() must agree with the scalar function at every cell."""
+
+    def test_matches_scalar(self):
+        np = pytest.importorskip("numpy")
+        from sunrise_sunset import solar_grid
+
+        d = date(2026, 6, 21)
+        grid = solar_grid(d, res=3)
+        assert grid["sunrise"].shape == (60, 120)
+        assert grid["lat"][0] == 88.5 and grid["lon"][0] == -178.5
+
+        def hours(dt):
+            return dt.hour + dt.minute / 60 + dt.second / 3600
+
+        for i, lat in enumerate(grid["lat"][::4]):
+            for j, lon in enumerate(grid["lon"][::7]):
+                rise, sset = sunrise_sunset(float(lat), float(lon), d, utc_offset=0)
+                got_rise = grid["sunrise"][4 * i, 7 * j]
+                got_set = grid["sunset"][4 * i, 7 * j]
+                if rise is None:
+                    assert np.isnan(got_rise) and np.isnan(got_set)
+                    continue
+                # Scalar times are truncated to the second
+                for got, want in ((got_rise, hours(rise)), (got_set, hours(sset))):
+                    diff = abs(got - want) % 24
+                    assert min(diff, 24 - diff) < 2 / 3600
+                length = grid["day_length"][4 * i, 7 * j]
+                assert abs(length - (sset - rise).total_seconds() / 3600 % 24) < 2 / 3600
+
+    def test_polar(self):
+        np = pytest.importorskip("numpy")
+        from sunrise_sunset import solar_grid
+
+        grid = solar_grid(date(2026, 6, 21), res=1, bounds=(-90, -80, 0, 10))
+        assert np.isnan(grid["sunrise"]).all()
+        assert (grid["day_length"] == 0).all()
+        grid = solar_grid(date(2026, 6, 21), res=1, bounds=(80, 90, 0, 10))
+        assert (grid["day_length"] == 24).all()
+
+    def test_twilight_longer_than_day(self):
+        pytest.importorskip("numpy")
+        from sunrise_sunset import solar_grid
+
+        d = date(2026, 3, 20)
+        day = solar_grid(d, res=5, bounds=(-60, 60, -180, 180))
+        civil = solar_grid(d, res=5, bounds=(-60, 60, -180, 180), altitude="civil")
+        assert (civil["day_length"] > day["day_length"]).all()
+
+    def test_processes(self):
+        np = pytest.importorskip("numpy")
+        from sunrise_sunset import solar_grid
+
+        d = date(2026, 12, 21)
+        one = solar_grid(d, res=2)
+        pool = solar_grid(d, res=2, processes=2)
+        for name in ("sunrise", "sunset", "day_length"):
+            assert np.array_equal(one[name], pool[name], equal_nan=True)
+
+    def test_bad_bounds(self):
+        pytest.importorskip("numpy")
+        from sunrise_sunset import solar_grid
+
+        with pytest.raises(ValueError):
+            solar_grid(date(2026, 1, 1), bounds=(10, -10, 0, 10))
+        with pytest.raises(ValueError):
+            solar_grid(date(2026, 1, 1), res=0)
+
+    def test_write_grid(self, tmp_path):
+        np = pytest.importorskip("numpy")
+        from sunrise_sunset import write_grid
+
+        values = np.array([[0, 6, 12], [24, np.nan, 30]], dtype=np.float32)
+        write_grid(str(tmp_path / "g.bin"), values)
+        raw = np.fromfile(tmp_path / "g.bin", dtype="<f4").reshape(2, 3)
+        assert np.array_equal(raw, values, equal_nan=True)
+
+        write_grid(str(tmp_path / "g.pgm"), values)
+        data = (tmp_path / "g.pgm").read_bytes()
+        assert data.startswith(b"P5\n3 2\n255\n")
+        assert list(data[-6:]) == [1, 64, 128, 255, 0, 255]
+
+    def test_cli(self, tmp_path, capsys):
+        np = pytest.importorskip("numpy")
+
+        out = tmp_path / "sunrise.bin"
+        main(["--grid", "1", "--field", "sunrise", "--bounds", "30", "60", "-10", "40",
+              "-d", "2026-06-21", "-o", str(out)])
+        assert "50 x 30" in capsys.readouterr().out
+        assert np.fromfile(out, dtype="<f4").size == 30 * 50
+        with pytest.raises(SystemExit):
+            main(["--grid", "1"])
+
+
+# ---------------------------------------------------------------------------
+# Accuracy against the stored reference table (see bench_sunrise_sunset.py)
+# ---------------------------------------------------------------------------
+
+class TestReference:
+    def test_table_is_reproducible(self):
+        from bench_sunrise_sunset import REFERENCE, read_reference, reference_times
+
+        rows = read_reference(REFERENCE)
+        assert len(rows) > 400
+        for lat, lon, d, rise, sset in rows[::37]:
+            assert reference_times(lat, lon, d) == (rise, sset)
+
+    def test_accuracy_budget(self):
+        # Regression budget for speed work: the simplified algorithm is off
+        # by ~25 s on average and up to ~8.5 min near the polar circles
+        from bench_sunrise_sunset import REFERENCE, accuracy, read_reference
+
+        result = accuracy(read_reference(REFERENCE))
+        for api in ("scalar", "batch"):
+            if api not in result:
+                continue
+            assert result[api]["polar_mismatches"] == 0
+            assert result[api]["mean_error_s"] <= 40
+            assert result[api]["max_error_s"] <= 600
+
+
+# ---------------------------------------------------------------------------
+# Time zones and CLI start-up
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def new_york():
+    from sunrise_sunset import zone
+
+    try:
+        return zone("America/New_York")
+    except ValueError:
+        pytest.skip("no IANA time zone database")
+
+
+class TestZones:
+    def test_dst_follows_date(self, new_york):
+        winter, _ = sunrise_sunset(40.7128, -74.0060, date(2026, 1, 15), tz=new_york)
+        summer, _ = sunrise_sunset(40.7128, -74.0060, date(2026, 6, 21), tz=new_york)
+        assert winter.utcoffset() == timedelta(hours=-5)
+        assert summer.utcoffset() == timedelta(hours=-4)
+        assert (winter.tzname(), summer.tzname()) == ("EST", "EDT")
+        # Same results as the fixed offsets of TestKnownLocations
+        assert summer == sunrise_sunset(40.7128, -74.0060, date(2026, 6, 21), utc_offset=-4)[0]
+
+    def test_zone_name(self, new_york):
+        d = date(2026, 6, 21)
+        assert (sunrise_sunset(40.7128, -74.0060, d, tz="America/New_York")
+                == sunrise_sunset(40.7128, -74.0060, d, tz=new_york))
+
+    def test_utc_offset_wins(self, new_york):
+        rise, _ = sunrise_sunset(40.7128, -74.0060, date(2026, 6, 21), utc_offset=0, tz=new_york)
+        assert rise.utcoffset() == timedelta(0)
+
+    def test_system_zone_per_date(self):
+        d = date(2026, 1, 15)
+        expected = datetime(2026, 1, 15, 12).astimezone().utcoffset()
+        rise, _ = sunrise_sunset(40.7128, -74.0060, d)
+        assert rise.utcoffset() == expected
+
+    def test_zone_caches_bounded(self):
+        from sunrise_sunset import _FIXED_ZONES, _LOCAL_ZONES, _ZONE_CACHE_SIZE
+
+        start = date(2020, 1, 1)
+        for i in range(2 * _ZONE_CACHE_SIZE):
+            sunrise_sunset(40.7128, -74.0060, start + timedelta(days=i))
+            sunrise_sunset(40.7128, -74.0060, start)
+            sunrise_sunset(40.7128, -74.0060, start, utc_offset=i / 60)
+        assert len(_LOCAL_ZONES) == len(_FIXED_ZONES) == _ZONE_CACHE_SIZE
+        # start was used on every pass, so it is the most recent, not evicted
+        assert list(_LOCAL_ZONES)[-1] == start
+        assert start + timedelta(days=1) not in _LOCAL_ZONES
+        assert 0.0 not in _FIXED_ZONES
+        last = (2 * _ZONE_CACHE_SIZE - 1) / 60
+        assert _FIXED_ZONES[last] == timezone(timedelta(hours=last))
+
+    def test_solar_events(self, new_york):
+        from sunrise_sunset import solar_events
+
+        events = solar_events(40.7128, -74.0060, date(2026, 7, 1), tz=new_york)
+        assert events["noon"].tzname() == "EDT"
+        assert events["civil"][0].tzname() == "EDT"
+
+    def test_unknown_zone(self):
+        from sunrise_sunset import zone
+
+        with pytest.raises(ValueError):
+            zone("Nowhere/Atlantis")
+
+    def test_table_across_dst(self, new_york):
+        pytest.importorskip("numpy")
+        import io
+        from sunrise_sunset import _zone_offset, write_table
+
+        start, end = date(2026, 3, 7), date(2026, 3, 9)
+        offsets = [_zone_offset(start + timedelta(days=i), None, new_york)[0] for i in range(3)]
+        assert offsets == [-5, -4, -4]
+        out = io.StringIO()
+        write_table(out, [("nyc", 40.7128, -74.0060)], start, end, offsets)
+        rows = out.getvalue().splitlines()[1:]
+        for row, d in zip(rows, (start, start + timedelta(days=1), end)):
+            rise, sset = sunrise_sunset(40.7128, -74.0060, d, tz=new_york)
+            assert row.split(",")[-2:] == [rise.strftime("%H:%M:%S"), sset.strftime("%H:%M:%S")]
+
+
+def _import_times(*args):
+    """Run python -X importtime and return {module: (self_us, cumulative_us)}."""
+    result = subprocess.run([sys.executable, "-X", "importtime", *args],
+                            capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line and "self [us]" not in line:
+            self_us, cumulative, name = line[len("import time:"):].split("|")
+            times[name.strip()] = (int(self_us), int(cumulative))
+    return times
+
+
+class TestStartup:
+    # Modules the common command line must not pay for
+    HEAVY = {"argparse", "collections", "re", "_strptime", "zoneinfo"}
+
+    # Time spent importing the module's own dependencies. Its self time is
+    # left out: it is mostly compiling the source when bytecode is not cached.
+    IMPORT_BUDGET_US = 5000
+
+    def test_import_budget(self):
+        samples = []
+        for _ in range(5):
+            times = _import_times("-c", "import sunrise_sunset")
+            assert not self.HEAVY & times.keys()
+            self_us, cumulative = times["sunrise_sunset"]
+            samples.append(cumulative - self_us)
+        best = min(samples)
+        assert best <= self.IMPORT_BUDGET_US, f"imports took {best} us"
+
+    def test_cli_fast_path(self):
+        times = _import_times("sunrise_sunset.py", "40.7128", "-74.0060",
+                              "-d", "2026-02-10", "-u", "-5")
+        assert not self.HEAVY & times.keys()
+
+    def test_cli_zone(self, new_york):
+        times = _import_times("sunrise_sunset.py", "40.7128", "-74.0060",
+                              "-d", "2026-07-10", "-z", "America/New_York")
+        assert "zoneinfo" in times
+        assert not (self.HEAVY - {"zoneinfo"}) & times.keys()
+
+    def test_parse_fast(self, new_york):
+        from sunrise_sunset import _parse_fast
+
+        assert _parse_fast(["40", "-74", "-d", "2026-7-4", "-u", "-4"]) == (
+            40.0, -74.0, date(2026, 7, 4), -4.0, None)
+        assert _parse_fast(["-33.9", "18.4", "--zone", "America/New_York"]) == (
+            -33.9, 18.4, None, None, new_york)
+        # Everything else goes to argparse
+        for argv in (["40"], ["-h"], ["40", "-74", "--events", "civil"],
+                     ["40", "-74", "-u", "1", "-z", "UTC"], ["40", "-74", "-d", "x"],
+                     ["40", "-74", "-d"], ["40", "-74", "-u", "1", "-u", "2"]):
+            assert _parse_fast(argv) is None
+
+    def test_main_zone(self, capsys, new_york):
+        main(["40.7128", "-74.0060", "-d", "2026-07-10", "-z", "America/New_York"])
+        assert "EDT" in capsys.readouterr().out
+        main(["40.7128", "-74.0060", "-d", "2026-07-10", "-z", "America/New_York",
+              "--events", "civil"])
+        out = capsys.readouterr().out
+        assert "Civil" in out and "EDT" in out
+        with pytest.raises(SystemExit):
+            main(["40.7128", "-74.0060", "-z", "Nowhere/Atlantis"])